@@ -0,0 +1,101 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+import numpy as np
+
+# Small instances with a known answer, solved by every engine that applies. Each check prints its
+# result and the script exits with 1 if any failed. Run from the repository root:
+#   python benchmarks/checks.py [--only NAME]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+class _Sheet:
+  # The attributes of read_data.ReadData that sheets.to_data uses, without a spreadsheet
+  def __init__(self, quantity, maintenance, price, maintenance_cost):
+    from min_costs_icu_beds.read_data import Table
+    self.hospitals = Table([1], names=['A'], construction_costs=[0.0], lb_beds=[0], ub_beds=[10],
+      coord_x=[0.0], coord_y=[0.0], built=[True])
+    self.equipments = Table([1], names=['Ventilador'], prices=[price], necessary_rates=[1.0],
+      maintenance_freqs=[1], maintenance_costs=[maintenance_cost])
+    self.staff = Table([], teams=np.array([], dtype=str), salaries=np.zeros(0), necessary_rates=np.zeros(0))
+    self.consumables = Table([], names=np.array([], dtype=str), prices=np.zeros(0), necessary_rates=np.zeros(0))
+    self.equipment_quantity = np.array([[quantity]], dtype=np.int64)
+    self.equipment_maintenance = np.array([[maintenance]], dtype=np.int64)
+    self.staff_quantity = np.zeros((1, 0), dtype=np.int64)
+    self.consumable_quantity = np.zeros((1, 0), dtype=np.int64)
+
+def _engines(data):
+  from min_costs_icu_beds.benders import Benders
+  from min_costs_icu_beds.heuristic import Greedy
+  from min_costs_icu_beds.matrix_model import MatrixModel
+  from min_costs_icu_beds.model import Model
+  return {
+    'pyomo': lambda: Model(data, tee=False).solution,
+    'matrix': lambda: MatrixModel(data, tee=False).solution,
+    'benders': lambda: Benders(data, tee=False, workers=1).solution,
+    'greedy': lambda: Greedy(data).solution,
+  }
+
+def check_repair_cost():
+  # Two units of one equipment, one of them in maintenance, and a demand of two beds needing one unit
+  # each: the plan repairs the unit at its maintenance cost (700) rather than buying one (1000)
+  from min_costs_icu_beds.sheets import to_data
+  failures = []
+  for name, solve in _engines(to_data(_Sheet(2, 1, 1000.0, 700.0), 2)).items():
+    with contextlib.redirect_stdout(io.StringIO()):
+      solution = solve()
+    objective = None if solution is None else solution.objective
+    print('  {:<8} {}'.format(name, objective))
+    if objective is None or abs(objective - 700.0) > 1e-6:
+      failures.append(name)
+  return failures
+
+def check_sweep():
+  # Demand levels of instances/mock.txt across its capacity of 65 beds, in one block: each level with a
+  # plan costs what a solve from scratch costs, and the levels beyond the capacity have no plan
+  from min_costs_icu_beds.data import Data
+  from min_costs_icu_beds.matrix_model import MatrixModel
+  from min_costs_icu_beds.sweep import sweep
+  data = Data(os.path.join(ROOT, 'instances', 'mock.txt'))
+  failures = []
+  with contextlib.redirect_stdout(io.StringIO()):
+    rows = sweep(data, range(60, 69), workers=1)
+  for row in rows:
+    data.d = row['demand']
+    with contextlib.redirect_stdout(io.StringIO()):
+      solution = MatrixModel(data, tee=False).solution
+    expected = None if solution is None else solution.objective
+    print('  {:<8} {} {}'.format(row['demand'], row['cost'], row['status']))
+    if (row['cost'] is None) != (expected is None) or (expected is not None and
+        abs(row['cost'] - expected) > 1e-6*max(1.0, abs(expected))):
+      failures.append(str(row['demand']))
+  return failures
+
+CHECKS = {
+  'repair_cost': check_repair_cost,
+  'sweep': check_sweep,
+}
+
+def main():
+  parser = argparse.ArgumentParser(description='Solve small instances with known answers.')
+  parser.add_argument('--only', choices=list(CHECKS), help='run one check')
+  args = parser.parse_args()
+
+  failed = []
+  for name, check in CHECKS.items():
+    if args.only is not None and name != args.only:
+      continue
+    print(name)
+    failures = check()
+    print('  ' + ('FAILED: ' + ', '.join(failures) if failures else 'ok'))
+    if failures:
+      failed.append(name)
+  if failed:
+    sys.exit(1)
+
+if __name__ == '__main__':
+  main()
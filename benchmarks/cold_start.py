@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Cold-start time of the package and its CLI, each measured in a fresh interpreter. Every command is
+# compared with the baseline as a multiple of the bare interpreter's startup in the same run, so the
+# baseline holds on another machine and a slower or busier one does not read as a regression. Run from
+# the repository root:
+#   python benchmarks/cold_start.py [--update]
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cold_start_baseline.json')
+
+PYTHON = [sys.executable, '-c', 'pass']
+COMMANDS = {
+  'import': [sys.executable, '-c', 'import min_costs_icu_beds'],
+  'cli_help': [sys.executable, '-m', 'min_costs_icu_beds', '--help'],
+  'import_model': [sys.executable, '-c', 'import min_costs_icu_beds.model'],
+  'import_matrix_model': [sys.executable, '-c', 'import min_costs_icu_beds.matrix_model'],
+}
+
+def measure(command, repeat):
+  times = []
+  for _ in range(repeat):
+    start = time.perf_counter()
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    times.append(time.perf_counter() - start)
+  return statistics.median(times)
+
+def main():
+  parser = argparse.ArgumentParser(description='Measure cold-start time against the stored baseline.')
+  parser.add_argument('--repeat', type=int, default=5)
+  parser.add_argument('--tolerance', type=float, default=1.5, help='allowed slowdown factor')
+  parser.add_argument('--update', action='store_true', help='store the measurements as the new baseline')
+  args = parser.parse_args()
+
+  python = measure(PYTHON, args.repeat)
+  seconds = {name: measure(command, args.repeat) for name, command in COMMANDS.items()}
+  results = {name: round(value/python, 3) for name, value in seconds.items()}
+  baseline = {}
+  if os.path.exists(BASELINE):
+    with open(BASELINE) as file:
+      baseline = json.load(file)
+
+  print('{:<20} {:8.3f} s'.format('python', python))
+  regressions = []
+  for name, ratio in results.items():
+    line = '{:<20} {:8.3f} s   {:6.2f} x python'.format(name, seconds[name], ratio)
+    if name in baseline:
+      line += '   baseline {:6.2f} x   x{:.2f}'.format(baseline[name], ratio/baseline[name])
+      if ratio > args.tolerance*baseline[name]:
+        regressions.append(name)
+        line += '   REGRESSION'
+    print(line)
+
+  if args.update:
+    with open(BASELINE, 'w') as file:
+      json.dump(results, file, indent=2)
+      file.write('\n')
+    print('Baseline written to', BASELINE)
+  elif regressions:
+    sys.exit(1)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,154 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Time and peak memory of each phase (parse, build, solve, print_solution, to_html) over a ladder of
+# generated instances, compared against the stored baseline. Every size runs in a fresh interpreter,
+# so one size's imports and caches do not leak into the next. Times are compared as multiples of a
+# calibration solve (the LP relaxation of a fixed instance) timed in the same interpreter right after
+# the phases, so the baseline holds on another machine or under another load, and objectives within the
+# relative MIP gap the solves stop at. Run from the repository root:
+#   python benchmarks/scaling.py [--engine pyomo|matrix] [--sizes 4,6,8,10,12] [--update]
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scaling_baseline.json')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PHASES = ['parse', 'build', 'solve', 'print_solution', 'to_html']
+CALIBRATION_SIZE = 80
+MIP_GAP = 1e-4 # HiGHS's default mip_rel_gap
+
+def calibrate(repeat=5):
+  # Fastest of repeat solves of the same LP, in seconds
+  from min_costs_icu_beds.generate import generate
+  from min_costs_icu_beds.matrix_model import MatrixModel
+  highs = MatrixModel(generate(CALIBRATION_SIZE, seed=0), tee=False, solve=False).load(False, relax=True)
+  times = []
+  for _ in range(repeat):
+    highs.clearSolver()
+    start = time.perf_counter()
+    highs.run()
+    times.append(time.perf_counter() - start)
+  return min(times)
+
+def run_size(engine, size, seed):
+  # Runs inside the child process, in a scratch directory for the generated instance
+  from min_costs_icu_beds.data import Data
+  from min_costs_icu_beds.generate import generate
+  if engine == 'matrix':
+    from min_costs_icu_beds.matrix_model import MatrixModel as Engine
+  else:
+    from min_costs_icu_beds.model import Model as Engine
+
+  with tempfile.TemporaryDirectory() as directory:
+    os.chdir(directory)
+    generate(size, seed=seed).save('instance.txt')
+    result = {'seconds': {}, 'peak_mb': {}}
+    state = {}
+    steps = {
+      'parse': lambda: state.update(data=Data('instance.txt')),
+      'build': lambda: state.update(model=Engine(state['data'], solve=False)),
+      'solve': lambda: state['model'].solve(tee=False),
+      'print_solution': lambda: state['model'].print_solution(),
+      'to_html': lambda: state['model'].to_html(),
+    }
+    for phase in PHASES:
+      tracemalloc.start()
+      start = time.perf_counter()
+      with contextlib.redirect_stdout(io.StringIO()):
+        steps[phase]()
+      result['seconds'][phase] = round(time.perf_counter() - start, 4)
+      # Python allocations only; memory held inside HiGHS shows up in max_rss_mb
+      result['peak_mb'][phase] = round(tracemalloc.get_traced_memory()[1]/2**20, 2)
+      tracemalloc.stop()
+    result['objective'] = state['model'].solution.objective
+    result['max_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024, 1)
+    with contextlib.redirect_stdout(io.StringIO()):
+      result['calibration'] = round(calibrate(), 4)
+    os.chdir(ROOT)
+  return result
+
+def measure(engine, size, seed):
+  command = [sys.executable, os.path.abspath(__file__), '--child', '--engine', engine, '--sizes', str(size),
+    '--seed', str(seed)]
+  output = subprocess.run(command, check=True, capture_output=True, text=True, cwd=ROOT).stdout
+  return json.loads(output.splitlines()[-1])
+
+def main():
+  parser = argparse.ArgumentParser(description='Measure per-phase time and memory against the stored baseline.')
+  parser.add_argument('--engine', choices=['pyomo', 'matrix'], default='pyomo')
+  parser.add_argument('--sizes', default='4,6,8,10,12', help='comma-separated numbers of facilities')
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--tolerance', type=float, default=1.5, help='allowed slowdown factor')
+  parser.add_argument('--floor', type=float, default=0.05,
+    help='phases faster than this many seconds are never reported as regressions')
+  parser.add_argument('--update', action='store_true', help='store the measurements as the new baseline')
+  parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+  args = parser.parse_args()
+  sizes = [int(size) for size in args.sizes.split(',')]
+
+  if args.child:
+    sys.path.insert(0, ROOT)
+    print(json.dumps(run_size(args.engine, sizes[0], args.seed)))
+    return
+
+  baseline = {}
+  if os.path.exists(BASELINE):
+    with open(BASELINE) as file:
+      baseline = json.load(file)
+  stored = baseline.get(args.engine, {})
+
+  print('{:>6} {:>15} {}  {:>10}'.format('|F|', 'phase', 'seconds  (baseline)', 'peak MB'))
+  results = {}
+  regressions = []
+  for size in sizes:
+    result = results[str(size)] = measure(args.engine, size, args.seed)
+    reference = stored.get(str(size))
+    if reference is not None and reference.get('seed', args.seed) != args.seed:
+      reference = None
+    # Baseline times recorded on another machine, or before calibration, in this machine's seconds
+    scale = None
+    if reference is not None and 'calibration' in reference:
+      scale = result['calibration']/reference['calibration']
+    for phase in PHASES:
+      seconds = result['seconds'][phase]
+      line = '{:>6} {:>15} {:8.3f}'.format(size, phase, seconds)
+      if scale is not None:
+        before = reference['seconds'][phase]*scale
+        line += '  ({:8.3f})'.format(before)
+        if seconds > max(args.tolerance*before, args.floor):
+          regressions.append('{} {}'.format(size, phase))
+          line += ' REGRESSION'
+      else:
+        line += '            '
+      print(line + '  {:>10.2f}'.format(result['peak_mb'][phase]))
+    line = '{:>6} {:>15} {:,.2f}   max RSS {:.1f} MB   calibration {:.3f} s'.format(size, 'objective',
+      result['objective'], result['max_rss_mb'], result['calibration'])
+    # The instances are seeded, so an objective further from the baseline than the gap both solves stop
+    # within means the model itself changed
+    if reference is not None and abs(result['objective'] - reference['objective']) > MIP_GAP*max(1, abs(reference['objective'])):
+      regressions.append('{} objective'.format(size))
+      line += '   CHANGED (baseline {:,.2f})'.format(reference['objective'])
+    print(line)
+    result['seed'] = args.seed
+
+  if args.update:
+    stored.update(results)
+    baseline[args.engine] = stored
+    with open(BASELINE, 'w') as file:
+      json.dump(baseline, file, indent=2, sort_keys=True)
+      file.write('\n')
+    print('Baseline written to', BASELINE)
+  elif regressions:
+    print('Regressions:', ', '.join(regressions))
+    sys.exit(1)
+
+if __name__ == '__main__':
+  main()
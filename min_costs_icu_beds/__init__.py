@@ -0,0 +1,29 @@
+# Submodules are imported on first attribute access, so importing the package stays cheap and
+# pyomo, HiGHS and the Google client libraries are only loaded by the code paths that need them
+_exports = {
+  'Data': 'data',
+  'TransferArcs': 'arcs',
+  'Presolve': 'presolve',
+  'Greedy': 'heuristic',
+  'Model': 'model',
+  'MatrixModel': 'matrix_model',
+  'Portfolio': 'portfolio',
+  'Benders': 'benders',
+  'Aggregation': 'aggregate',
+  'Solution': 'solution',
+  'Sensitivity': 'sensitivity',
+  'SolutionCache': 'cache',
+  'ReadData': 'read_data',
+  'to_data': 'sheets',
+  'Telemetry': 'telemetry',
+}
+
+__all__ = list(_exports)
+
+def __getattr__(name):
+  if name not in _exports:
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+  import importlib
+  value = getattr(importlib.import_module('.' + _exports[name], __name__), name)
+  globals()[name] = value
+  return value
@@ -0,0 +1,224 @@
+import concurrent.futures
+import os
+
+import numpy as np
+
+from . import report
+from .arcs import TransferArcs
+from .data import Data
+from .telemetry import Telemetry
+
+# Two-level solve for instances too large for the exact model. The facilities are split into regions
+# by repeated 2-means on their coordinates (or on their rows of transfer costs when the instance has
+# none), until no region has more than region_size facilities. A coarse model with two facilities per
+# region, its built facilities and the others, fixes how many beds each region gets, then every region
+# is solved on its own with its bed target as demand, in parallel, and the purchases, repairs and
+# transfers of the combined openings and beds are re-optimized over the whole instance (see
+# Benders.complete), which brings back the transfers between regions.
+#
+# The coarse model is a relaxation of the full one, so its dual bound is a lower bound on the optimum:
+# each aggregated facility has the summed capacity u, availability a and repairable units m of its
+# members; the built ones cost nothing to open and have the summed lower bound l (those beds are
+# forced), the others the cheapest opening cost and lower bound among them; transfers cost the
+# cheapest transfer between any two of the members. Each facility can move up to its own units a of an
+# equipment along every one of its arcs, so the equipment moved from one aggregated facility to
+# another is capped by the members' summed a times the receiving members.
+
+def _split(points):
+  # Two clusters of the rows of points (a boolean mask of the second), by Lloyd's iterations from the
+  # row farthest from the mean and the row farthest from that one
+  first = np.argmax(((points - points.mean(axis=0))**2).sum(axis=1))
+  second = np.argmax(((points - points[first])**2).sum(axis=1))
+  centers = points[[first, second]]
+  labels = None
+  for _ in range(100):
+    distance = ((points[:, np.newaxis] - centers[np.newaxis])**2).sum(axis=2)
+    new = distance[:, 1] < distance[:, 0]
+    if labels is not None and (new == labels).all():
+      break
+    labels = new
+    if labels.all() or not labels.any():
+      break
+    centers = np.array([points[~labels].mean(axis=0), points[labels].mean(axis=0)])
+  if labels.all() or not labels.any(): # identical points
+    labels = np.arange(len(points)) >= len(points)//2
+  return labels
+
+def regions(data, region_size):
+  # Region label of each facility
+  if data.coords is not None:
+    points = np.asarray(data.coords, dtype=np.float64)
+  else:
+    points = np.asarray(data.t, dtype=np.float64)[data.E + data.S].mean(axis=0) if data.E + data.S else \
+      np.zeros((len(data.F), 1))
+  labels = np.zeros(len(data.F), dtype=np.int64)
+  pending = [np.arange(len(data.F))]
+  count = 0
+  while pending:
+    members = pending.pop()
+    if len(members) <= region_size:
+      labels[members] = count
+      count += 1
+      continue
+    second = _split(points[members])
+    pending += [members[~second], members[second]]
+  return labels
+
+def subset(data, members, demand):
+  # The instance restricted to some facilities, with the given demand
+  sub = Data()
+  index = {i: k for k, i in enumerate(members.tolist())}
+  sub.F = list(range(len(members)))
+  sub.K = [index[i] for i in data.K if i in index]
+  sub.E, sub.I, sub.S, sub.C = list(data.E), list(data.I), list(data.S), list(data.C)
+  sub.d = int(demand)
+  sub.c = np.asarray(data.c, dtype=np.float64)[members]
+  sub.l = np.asarray(data.l)[members]
+  sub.u = np.asarray(data.u)[members]
+  sub.p, sub.r, sub.n = data.p, data.r, data.n
+  sub.a = np.asarray(data.a)[members]
+  sub.m = np.asarray(data.m)[members]
+  sub.t = np.asarray(data.t)[:, members][:, :, members]
+  sub.coords = None if data.coords is None else np.asarray(data.coords)[members]
+  return sub
+
+def coarse(data, labels):
+  # The aggregated instance, with one facility for the built facilities of each region and one for the
+  # rest, so that beds beyond the built capacity of a region still cost an opening; also the region of
+  # each aggregated facility and the cap of each equipment transfer (E x G x G)
+  built = np.zeros(len(data.F), dtype=bool)
+  built[data.K] = True
+  groups, group_of = np.unique(2*labels + built, return_inverse=True)
+  n_g = len(groups)
+  c = np.asarray(data.c, dtype=np.float64)
+  l = np.asarray(data.l, dtype=np.int64)
+  m = np.asarray(data.m)
+  t = np.asarray(data.t, dtype=np.float64)
+  agg = Data()
+  agg.F = list(range(n_g))
+  agg.K = np.nonzero(groups % 2)[0].tolist()
+  agg.E, agg.I, agg.S, agg.C = list(data.E), list(data.I), list(data.S), list(data.C)
+  agg.d = data.d
+  agg.c = np.zeros(n_g)
+  agg.l = np.zeros(n_g, dtype=np.int64)
+  agg.u = np.bincount(group_of, weights=data.u, minlength=n_g).astype(np.int64)
+  agg.a = np.zeros((n_g, np.asarray(data.a).shape[1]), dtype=np.int64)
+  agg.m = np.zeros((n_g, m.shape[1]), dtype=np.int64)
+  members = [np.nonzero(group_of == g)[0] for g in range(n_g)]
+  for g, group in enumerate(members):
+    if groups[g] % 2:
+      agg.l[g] = l[group].sum()
+    else:
+      agg.c[g] = c[group].min()
+      agg.l[g] = l[group].min()
+    agg.a[g] = np.asarray(data.a)[group].sum(axis=0)
+    agg.m[g] = m[group].sum(axis=0)
+  agg.p, agg.r, agg.n = data.p, data.r, data.n
+  agg.t = np.zeros((t.shape[0], n_g, n_g))
+  off_diagonal = np.where(np.eye(len(data.F), dtype=bool), np.inf, t[data.E + data.S])
+  for g, group in enumerate(members):
+    rows = off_diagonal[:, group].min(axis=1) # (transferable, F): cheapest from group g
+    for h, other in enumerate(members):
+      if h != g:
+        agg.t[data.E + data.S, g, h] = rows[:, other].min(axis=1)
+  agg.coords = None
+  sizes = np.bincount(group_of, minlength=n_g)
+  transfer_cap = agg.a[:, :len(data.E)].T[:, :, np.newaxis]*sizes[np.newaxis, np.newaxis, :]
+  return agg, groups//2, transfer_cap.astype(np.float64)
+
+def _solve_region(data, presolve, warm_start):
+  # Openings and beds of one region, or None
+  from .benders import Benders
+  model = Benders(data, tee=False, presolve=presolve, warm_start=warm_start, workers=1)
+  return None if model.solution is None else (model.x, model.y)
+
+class Aggregation:
+  def __init__(self, data, arcs=None, region_size=20, workers=None, tee=False, solve=True, telemetry=None,
+      presolve=True, warm_start=True, coarse_gap=1e-3, neighbours=20):
+    # region_size: most facilities in a region; workers: processes for the regional models and the
+    # final transfers (default: one per core); coarse_gap: relative gap at which the coarse model stops,
+    # which only weakens the bound by as much; neighbours: without arcs, the final transfers are only
+    # between each facility and its nearest neighbours (None for every pair), which keeps the plan
+    # feasible for the full model
+    self.data = data
+    self.arcs = arcs if arcs is not None else TransferArcs(data, k=neighbours)
+    self.region_size = region_size
+    self.workers = workers or os.cpu_count() or 1
+    self.tee = tee
+    self.telemetry = telemetry if telemetry is not None else Telemetry()
+    self.presolve_enabled = presolve
+    self.warm_start = warm_start
+    self.coarse_gap = coarse_gap
+    self.presolve = None
+    with self.telemetry.phase('cluster'):
+      self.labels = regions(data, region_size)
+    self.n_regions = int(self.labels.max()) + 1
+    if solve:
+      self.solve()
+
+  def export(self, filename=None, background=None, **options):
+    # The full model, see export.export_model
+    from .matrix_model import MatrixModel
+    return MatrixModel(self.data, self.arcs, solve=False, presolve=False).export(filename, background, **options)
+
+  def solve(self):
+    from .benders import Benders
+    with self.telemetry.phase('coarse'):
+      agg, region_of, transfer_cap = coarse(self.data, self.labels)
+      model = Benders(agg, tee=self.tee, presolve=self.presolve_enabled, warm_start=self.warm_start,
+        workers=self.workers, tolerance=self.coarse_gap, transfer_cap=transfer_cap)
+    self.coarse = model
+    self.lower_bound = model.lower_bound
+    self.solution = None
+    if model.solution is None:
+      self.status = 'Coarse model not solved'
+      return
+    self.targets = np.bincount(region_of, weights=model.x, minlength=self.n_regions).astype(np.int64)
+
+    # Each region with beds gets its own model; a region without any has no built facility
+    members = [np.nonzero(self.labels == g)[0] for g in range(self.n_regions)]
+    jobs = [g for g in range(self.n_regions) if self.targets[g] > 0]
+    instances = [subset(self.data, members[g], self.targets[g]) for g in jobs]
+    with self.telemetry.phase('regions'):
+      if self.workers == 1 or len(jobs) <= 1:
+        results = [_solve_region(instance, self.presolve_enabled, self.warm_start) for instance in instances]
+      else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as executor:
+          results = list(executor.map(_solve_region, instances, [self.presolve_enabled]*len(jobs),
+            [self.warm_start]*len(jobs)))
+    if any(result is None for result in results):
+      self.status = 'Region not solved'
+      return
+    x = np.zeros(len(self.data.F))
+    y = np.zeros(len(self.data.F))
+    for g, (x_g, y_g) in zip(jobs, results):
+      x[members[g]] = x_g
+      y[members[g]] = y_g
+
+    with self.telemetry.phase('transfers'):
+      self.benders = Benders(self.data, self.arcs, solve=False, presolve=self.presolve_enabled,
+        workers=self.workers, telemetry=self.telemetry)
+      self.benders.complete(x, y)
+    self.presolve = self.benders.presolve
+    self.solution = self.benders.solution
+    self.objective_value = self.benders.objective_value
+    self.x, self.y = x, y
+    self.gap = (self.objective_value - self.lower_bound)/max(1.0, abs(self.objective_value))
+    self.status = 'Feasible'
+    self.telemetry.set('regions', self.n_regions)
+    self.telemetry.set('lower_bound', self.lower_bound)
+    self.telemetry.set('objective', self.objective_value)
+    self.telemetry.set('gap', self.gap)
+
+  def print_results(self):
+    if self.solution is None:
+      print('Aggregation: {} regions, {}'.format(self.n_regions, self.status))
+      return
+    print('Aggregation: {} regions, bound {:,.2f}, best {:,.2f} (gap {:.2%})'.format(self.n_regions,
+      self.lower_bound, self.objective_value, self.gap))
+
+  def print_solution(self):
+    report.print_solution(self.solution)
+
+  def to_html(self):
+    return report.to_html(self.solution)
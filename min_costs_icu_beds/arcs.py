@@ -0,0 +1,47 @@
+import numpy as np
+
+class TransferArcs:
+  def __init__(self, data, k=None, max_distance=None, max_cost=None):
+    # Transfer arcs (j, i, l): requirement j moved from facility i to facility l, l != i. Without
+    # arguments every pair is kept; otherwise only pairs among each facility's k nearest neighbours,
+    # within max_distance or with transfer cost at most max_cost
+    n_f = len(data.F)
+    self.transferable = np.array(data.E + data.S, dtype=np.int64)
+    t = data.t[self.transferable]
+    off_diagonal = ~np.eye(n_f, dtype=bool)
+    self.keep = np.repeat(off_diagonal[np.newaxis], len(self.transferable), axis=0)
+    self.total = int(self.keep.sum())
+    if data.coords is not None:
+      xy = np.asarray(data.coords, dtype=np.float64)
+      distance = np.broadcast_to(np.sqrt(((xy[:, np.newaxis] - xy[np.newaxis])**2).sum(axis=2)), t.shape)
+    else:
+      distance = t # without coordinates, the transfer cost is the distance
+    if max_distance is not None:
+      self.keep &= distance <= max_distance
+    if max_cost is not None:
+      self.keep &= t <= max_cost
+    if k is not None and k < n_f - 1:
+      nearest = np.argpartition(np.where(off_diagonal, distance, np.inf), k, axis=2)[:, :, :k]
+      neighbours = np.zeros_like(self.keep)
+      np.put_along_axis(neighbours, nearest, True, axis=2)
+      self.keep &= neighbours | neighbours.transpose(0, 2, 1)
+    self.update()
+
+  def update(self):
+    position, self.i, self.l = np.nonzero(self.keep)
+    self.j = self.transferable[position]
+    self.dropped = self.total - len(self.j)
+
+  def pruned(self):
+    position, i, l = np.nonzero(~self.keep & ~np.eye(self.keep.shape[1], dtype=bool))
+    return self.transferable[position], i, l
+
+  def add(self, j, i, l):
+    self.keep[np.searchsorted(self.transferable, j), i, l] = True
+    self.update()
+
+  def index(self):
+    return list(zip(self.j.tolist(), self.i.tolist(), self.l.tolist()))
+
+  def report(self):
+    print('Transfer arcs:', len(self.j), 'of', self.total, '(dropped', str(self.dropped) + ')')
@@ -0,0 +1,127 @@
+import concurrent.futures
+import csv
+import glob
+import json
+import os
+import time
+
+# Many instances at once, one per worker process. Each instance gets its own directory under the
+# output directory, named after the file, for its report, solution and metrics (and its model with
+# export), so no two solves write to the same path, and the batch ends with one row per instance. Its
+# build time covers parsing, the presolve, the model and the export, its solve time the solve alone, and
+# its seconds the whole instance, rendering included.
+
+COLUMNS = ['instance', 'status', 'cost', 'bound', 'gap', 'hospitals_opened', 'beds', 'beds_added',
+  'build_seconds', 'solve_seconds', 'seconds', 'output']
+EXTENSIONS = ('.txt', '.npz', '.json')
+
+def instances(patterns):
+  # Instance files of each directory, glob pattern or file name, sorted and without repeats
+  found = []
+  for pattern in patterns:
+    if os.path.isdir(pattern):
+      found += sorted(os.path.join(pattern, name) for name in os.listdir(pattern) if name.endswith(EXTENSIONS))
+    elif glob.has_magic(pattern):
+      found += sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+    else:
+      found.append(pattern)
+  return list(dict.fromkeys(found))
+
+def outputs(paths, output_dir):
+  # One directory per instance, numbered when two files have the same name
+  names = {}
+  directories = []
+  for path in paths:
+    name = os.path.splitext(os.path.basename(path))[0]
+    names[name] = names.get(name, 0) + 1
+    directories.append(os.path.join(output_dir, name if names[name] == 1 else '{}-{}'.format(name, names[name])))
+  return directories
+
+def _solve_instance(path, directory, engine, time_limit, gap, presolve, warm_start, export):
+  from . import report
+  from .data import Data
+  from .snapshot import gap as relative_gap, solution_dict
+  from .telemetry import Telemetry
+  started = time.perf_counter()
+  row = dict.fromkeys(COLUMNS)
+  row.update(instance=path, output=directory)
+  try:
+    telemetry = Telemetry(command='batch', instance=path, engine=engine)
+    with telemetry.phase('parse'):
+      data = Data(path)
+    os.makedirs(directory, exist_ok=True)
+    options = {'tee': False, 'solve': False, 'telemetry': telemetry, 'presolve': presolve,
+      'warm_start': warm_start, 'time_limit': time_limit}
+    if engine == 'benders':
+      from .benders import Benders
+      model = Benders(data, workers=1, **options, **({} if gap is None else {'tolerance': gap}))
+    elif engine == 'pyomo':
+      from .model import Model
+      model = Model(data, gap=gap, **options)
+    else:
+      from .matrix_model import MatrixModel
+      model = MatrixModel(data, gap=gap, **options)
+    if export:
+      model.export(os.path.join(directory, 'model.lp'))
+    solving = time.perf_counter()
+    row['build_seconds'] = solving - started
+    model.solve(False)
+    row['solve_seconds'] = time.perf_counter() - solving
+    if engine == 'benders': # the status of its convergence check, not of its last master solve
+      row['status'] = model.status
+    else:
+      highs = model.opt._solver_model if engine == 'pyomo' else model.highs
+      row['status'] = highs.modelStatusToString(highs.getModelStatus())
+    solution = model.solution
+    if solution is not None:
+      with telemetry.phase('render'):
+        with open(os.path.join(directory, 'output.html'), 'w') as file:
+          report.write_html(solution, file)
+        with open(os.path.join(directory, 'solution.json'), 'w') as file:
+          json.dump(solution_dict(solution), file)
+      row.update(cost=solution.objective, bound=model.lower_bound, gap=relative_gap(solution.objective,
+        model.lower_bound), hospitals_opened=solution.hospitals_opened(), beds=int(solution.x.sum()),
+        beds_added=solution.total_added_beds())
+    telemetry.write(os.path.join(directory, 'metrics.json'))
+  except Exception as error:
+    row['status'] = 'Error: {}'.format(error)
+  row['seconds'] = time.perf_counter() - started
+  return row
+
+def batch(paths, output_dir, engine='matrix', workers=None, time_limit=None, gap=None, presolve=True,
+    warm_start=True, export=False):
+  # Rows in the order of paths; time_limit and gap apply to each instance
+  directories = outputs(paths, output_dir)
+  arguments = [paths, directories] + [[value]*len(paths) for value in (engine, time_limit, gap, presolve,
+    warm_start, export)]
+  workers = min(workers or os.cpu_count() or 1, len(paths))
+  if workers <= 1:
+    return [_solve_instance(*values) for values in zip(*arguments)]
+  with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+    return list(executor.map(_solve_instance, *arguments))
+
+def print_table(rows):
+  def seconds(value):
+    return '-' if value is None else '{:.2f}'.format(value)
+  width = max([8] + [len(row['instance']) for row in rows])
+  print('{:<{}} {:>14} {:>8} {:>10} {:>6} {:>8} {:>9} {:>9}  {}'.format('Instance', width, 'Cost', 'Gap', 'Opened',
+    'Beds', 'Added', 'Build', 'Solve', 'Status'))
+  for row in rows:
+    if row['cost'] is None:
+      print('{:<{}} {:>14} {:>8} {:>10} {:>6} {:>8} {:>9} {:>9}  {}'.format(row['instance'], width, '-', '-', '-', '-',
+        '-', seconds(row['build_seconds']), seconds(row['solve_seconds']), row['status']))
+    else:
+      print('{:<{}} {:>14,.2f} {:>8} {:>10} {:>6} {:>8} {:>9} {:>9}  {}'.format(row['instance'], width, row['cost'],
+        '-' if row['gap'] is None else '{:.2%}'.format(row['gap']), row['hospitals_opened'], row['beds'],
+        row['beds_added'], seconds(row['build_seconds']), seconds(row['solve_seconds']), row['status']))
+  solved = [row for row in rows if row['cost'] is not None]
+  print('{} of {} instances with a plan, total cost {:,.2f}, {:.2f} seconds of building, {:.2f} of solving, '
+    '{:.2f} in all'.format(len(solved), len(rows), sum(row['cost'] for row in solved),
+    sum(row['build_seconds'] or 0 for row in rows), sum(row['solve_seconds'] or 0 for row in rows),
+    sum(row['seconds'] for row in rows)))
+
+def write_csv(rows, filename):
+  with open(filename, 'w', newline='') as file:
+    writer = csv.DictWriter(file, fieldnames=COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
@@ -0,0 +1,382 @@
+import concurrent.futures
+import contextlib
+import os
+import time
+
+import highspy
+import numpy as np
+import scipy.sparse as sp
+
+from . import report
+from .arcs import TransferArcs
+from .export import export_model
+from .heuristic import Greedy
+from .presolve import Presolve
+from .solution import Solution
+from .telemetry import Telemetry
+
+# Benders decomposition of the same model. Once the beds x are chosen, the requirements are
+# independent: each one is a min-cost flow over purchases, repairs and transfers that covers
+# ceil(n[j]*x[i]) units at every facility. The master problem holds the openings y, the beds x,
+# integer coverage targets q[i, j] >= n[j]*x[i] and one cost estimate theta[j] per requirement; the
+# subproblem of requirement j is the LP of that flow for fixed targets q[:, j], whose constraint matrix
+# is a network matrix, so its optimum is integral and equal to the integer one. Its row duals make
+# the cut theta[j] >= cost_j(q') + dual.(q[:, j] - q'[:, j]), exact at q' and valid elsewhere since the
+# cost is convex in the targets. The master is first iterated as an LP, which gives most cuts cheaply,
+# then as a MIP until its bound meets the best plan found.
+
+class _Subproblem:
+  # The transfer problem of requirement j as a persistent HiGHS LP; only the row bounds change between
+  # solves, so each solve starts from the previous basis
+  def __init__(self, data, arcs, repairable, repair_cost, transfer_cap, j):
+    n_f = len(data.F)
+    a = np.asarray(data.a, dtype=np.float64)[:, j]
+    self.a = a
+    arc = np.nonzero(arcs.j == j)[0]
+    self.arc_i, self.arc_l = arcs.i[arc], arcs.l[arc]
+    self.w_i = np.nonzero(repairable[:, j])[0] if j < repairable.shape[1] else np.zeros(0, dtype=np.int64)
+    n_w, n_v = len(self.w_i), len(arc)
+    self.n_f, self.n_w = n_f, n_w
+
+    # Columns z (F) | w (repairable facilities) | v (arcs); rows: coverage of each facility
+    m = np.asarray(data.m, dtype=np.float64)
+    cost = np.concatenate([np.full(n_f, float(data.p[j])), repair_cost[self.w_i, j] if n_w else np.zeros(0),
+      data.t[j, self.arc_i, self.arc_l]])
+    upper = np.concatenate([np.full(n_f, highspy.kHighsInf), m[self.w_i, j] if n_w else np.zeros(0),
+      (a[self.arc_i] if transfer_cap is None else transfer_cap[j, self.arc_i, self.arc_l]) if j < len(data.E) else
+      np.full(n_v, highspy.kHighsInf)])
+    rows = np.concatenate([np.arange(n_f), self.w_i, self.arc_l, self.arc_i])
+    cols = np.concatenate([np.arange(n_f), n_f + np.arange(n_w), n_f + n_w + np.arange(n_v),
+      n_f + n_w + np.arange(n_v)])
+    vals = np.concatenate([np.ones(n_f + n_w + n_v), -np.ones(n_v)])
+    matrix = sp.csc_matrix((vals, (rows, cols)), shape=(n_f, n_f + n_w + n_v))
+    self.highs = highspy.Highs()
+    self.highs.setOptionValue('output_flag', False)
+    self.highs.passModel(matrix.shape[1], n_f, matrix.nnz, int(highspy.MatrixFormat.kColwise),
+      int(highspy.ObjSense.kMinimize), 0.0, cost, np.zeros(matrix.shape[1]), upper, -a,
+      np.full(n_f, highspy.kHighsInf), matrix.indptr.astype(np.int32), matrix.indices.astype(np.int32),
+      matrix.data, np.zeros(matrix.shape[1], dtype=np.int32))
+    self.rows = np.arange(n_f, dtype=np.int32)
+
+  def solve(self, q, primal=False):
+    # Cost and row duals at targets q; with primal also the z, w and v values
+    lower = q - self.a
+    self.highs.changeRowsBounds(self.n_f, self.rows, lower, np.full(self.n_f, highspy.kHighsInf))
+    self.highs.run()
+    solution = self.highs.getSolution()
+    result = (self.highs.getInfo().objective_function_value, np.array(solution.row_dual))
+    if primal:
+      values = np.rint(np.array(solution.col_value))
+      result += (values[:self.n_f], values[self.n_f:self.n_f + self.n_w], values[self.n_f + self.n_w:])
+    return result
+
+_subproblems = {}
+
+def _init_worker(data, arcs, repairable, repair_cost, transfer_cap):
+  _subproblems.clear()
+  _subproblems['setup'] = (data, arcs, repairable, repair_cost, transfer_cap)
+
+def _solve_subproblem(j, q, primal=False):
+  # In a worker process: each one builds the subproblems it is handed once and keeps them
+  if j not in _subproblems:
+    _subproblems[j] = _Subproblem(*_subproblems['setup'], j)
+  return _subproblems[j].solve(q, primal)
+
+class Benders:
+  def __init__(self, data, arcs=None, tee=True, solve=True, telemetry=None, presolve=True, warm_start=True,
+      workers=None, tolerance=1e-4, max_iterations=200, repair_cost=None, transfer_cap=None, time_limit=None,
+      on_incumbent=None):
+    # workers: processes for the subproblems (default: one per core; 1 solves them in this process);
+    # tolerance: relative gap between the bound and the best plan at which the loop stops; repair_cost:
+    # cost of each repaired unit per facility and requirement, r by default as in the model; transfer_cap:
+    # most units of each equipment moved from one facility to another (E x F x F), a of the sender by
+    # default as in the model; time_limit:
+    # seconds after which the loop stops with the best plan found; on_incumbent(solution, bound): called
+    # with each improved plan (see snapshot.py)
+    self.data = data
+    self.time_limit = time_limit
+    self.on_incumbent = on_incumbent
+    self.repair_cost = (np.broadcast_to(np.asarray(data.r, dtype=np.float64), np.shape(data.m)) if repair_cost is None
+      else np.asarray(repair_cost, dtype=np.float64))
+    self.transfer_cap = transfer_cap
+    self.arcs = arcs if arcs is not None else TransferArcs(data)
+    self.telemetry = telemetry if telemetry is not None else Telemetry()
+    self.warm_start = warm_start
+    self.workers = workers or os.cpu_count() or 1
+    self.tolerance = tolerance
+    self.max_iterations = max_iterations
+    self.presolve = None
+    if presolve:
+      with self.telemetry.phase('presolve'):
+        self.presolve = Presolve(data, self.arcs)
+      self.arcs = self.presolve.arcs
+    with self.telemetry.phase('build'):
+      self.build()
+    if solve:
+      self.solve(tee)
+
+  def build(self):
+    data = self.data
+    n_f, n_r = len(data.F), len(data.E + data.I + data.S + data.C)
+    self.n_f, self.n_r = n_f, n_r
+    self.repairable = (self.presolve.repairable if self.presolve is not None else
+      np.ones((n_f, len(data.E + data.I)), dtype=bool))
+    n = np.asarray(data.n, dtype=np.float64)
+    u = np.asarray(data.u, dtype=np.float64)
+
+    # Master columns: x (F) | y (F) | q (F x R) | theta (R)
+    self.y_start = n_f
+    self.q_start = 2*n_f
+    self.theta_start = self.q_start + n_f*n_r
+    self.num_col = self.theta_start + n_r
+    facilities = np.arange(n_f)
+    q_cols = self.q_start + np.arange(n_f*n_r).reshape(n_f, n_r)
+    self.cost = np.concatenate([np.zeros(n_f), np.asarray(data.c, dtype=np.float64), np.zeros(n_f*n_r),
+      np.ones(n_r)])
+    self.col_lower = np.zeros(self.num_col)
+    self.col_lower[self.y_start + np.array(data.K, dtype=np.int64)] = 1 # theta >= 0: no cost is negative
+    self.col_upper = np.full(self.num_col, highspy.kHighsInf)
+    self.col_upper[:n_f] = u
+    self.col_upper[self.y_start:self.q_start] = 1
+    self.col_upper[self.q_start:self.theta_start] = np.ceil(np.outer(u, n) - 1e-9).ravel()
+    self.integrality = np.full(self.num_col, int(highspy.HighsVarType.kInteger), dtype=np.int32)
+    self.integrality[self.theta_start:] = int(highspy.HighsVarType.kContinuous)
+
+    # Rows: demand (1) | l*y - x <= 0, x/u - y <= 0, y - x <= 0 (3 x F) | q - n*x >= 0 (F x R)
+    target_start = 1 + 3*n_f
+    self.num_row = target_start + n_f*n_r
+    self.row_lower = np.concatenate([[data.d], np.full(3*n_f, -highspy.kHighsInf), np.zeros(n_f*n_r)])
+    self.row_upper = np.concatenate([[highspy.kHighsInf], np.zeros(3*n_f), np.full(n_f*n_r, highspy.kHighsInf)])
+    target_rows = target_start + np.arange(n_f*n_r)
+    rows = [np.zeros(n_f, dtype=np.int64), 1 + facilities, 1 + facilities, 1 + n_f + facilities,
+      1 + n_f + facilities, 1 + 2*n_f + facilities, 1 + 2*n_f + facilities, target_rows, target_rows]
+    cols = [facilities, self.y_start + facilities, facilities, facilities, self.y_start + facilities,
+      self.y_start + facilities, facilities, q_cols.ravel(), np.repeat(facilities, n_r)]
+    vals = [np.ones(n_f), np.asarray(data.l, dtype=np.float64), -np.ones(n_f), 1/u, -np.ones(n_f),
+      np.ones(n_f), -np.ones(n_f), np.ones(n_f*n_r), -np.tile(n, n_f)]
+    rows, cols, vals = np.concatenate(rows), np.concatenate(cols), np.concatenate(vals)
+    nonzero = vals != 0
+    self.matrix = sp.csr_matrix((vals[nonzero], (rows[nonzero], cols[nonzero])),
+      shape=(self.num_row, self.num_col))
+
+  def load(self, tee=True):
+    highs = highspy.Highs()
+    highs.setOptionValue('output_flag', tee)
+    highs.setOptionValue('mip_rel_gap', self.tolerance)
+    highs.passModel(self.num_col, self.num_row, self.matrix.nnz, int(highspy.MatrixFormat.kRowwise),
+      int(highspy.ObjSense.kMinimize), 0.0, self.cost, self.col_lower, self.col_upper, self.row_lower,
+      self.row_upper, self.matrix.indptr.astype(np.int32), self.matrix.indices.astype(np.int32),
+      self.matrix.data, self.integrality)
+    return highs
+
+  def write_model(self, filename):
+    # The monolithic model this engine decomposes
+    from .matrix_model import MatrixModel
+    MatrixModel(self.data, self.arcs, solve=False, presolve=False).write_model(filename)
+
+  def export(self, filename=None, background=None, **options):
+    # See export.export_model
+    return export_model(self, filename, background, **options)
+
+  def subproblems(self, q, primal=False):
+    # Results of every subproblem at targets q (F x R), in requirement order
+    columns = [np.ascontiguousarray(q[:, j]) for j in range(self.n_r)]
+    if self.executor is None:
+      return [_solve_subproblem(j, columns[j], primal) for j in range(self.n_r)]
+    return list(self.executor.map(_solve_subproblem, range(self.n_r), columns, [primal]*self.n_r,
+      chunksize=max(1, self.n_r//(4*self.workers))))
+
+  def add_cuts(self, q, results, theta=None):
+    # One cut per requirement whose estimate theta[j] is below its cost at q (all of them without
+    # theta); returns the number added
+    added = 0
+    for j, (value, dual) in enumerate(result[:2] for result in results):
+      if theta is not None and theta[j] >= value - self.tolerance*max(1.0, abs(value)):
+        continue
+      # theta[j] - dual.q[:, j] >= value - dual.q'[:, j]
+      cols = np.concatenate([[self.theta_start + j], self.q_start + np.arange(self.n_f)*self.n_r + j])
+      vals = np.concatenate([[1.0], -dual])
+      keep = vals != 0
+      self.master.addRow(value - float(dual @ q[:, j]), highspy.kHighsInf, int(keep.sum()),
+        cols[keep].astype(np.int32), vals[keep])
+      added += 1
+    self.cuts += added
+    return added
+
+  def targets(self, values):
+    return np.rint(values[self.q_start:self.theta_start]).reshape(self.n_f, self.n_r)
+
+  @contextlib.contextmanager
+  def pool(self):
+    # Worker processes holding the subproblems, or this process with a single worker
+    self.executor = None
+    if self.workers > 1:
+      self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=min(self.workers, self.n_r),
+        initializer=_init_worker, initargs=(self.data, self.arcs, self.repairable, self.repair_cost,
+          self.transfer_cap))
+    else:
+      _init_worker(self.data, self.arcs, self.repairable, self.repair_cost, self.transfer_cap)
+    try:
+      yield
+    finally:
+      if self.executor is not None:
+        self.executor.shutdown()
+      _subproblems.clear()
+
+  def solve(self, tee=True):
+    with self.pool():
+      self.iterate(tee)
+
+  def complete(self, x, y):
+    # The cheapest purchases, repairs and transfers for given openings y and beds x, as the solution
+    q = np.ceil(np.outer(x, np.asarray(self.data.n, dtype=np.float64)) - 1e-9)
+    with self.pool():
+      with self.telemetry.phase('subproblems'):
+        theta = np.array([result[0] for result in self.subproblems(q)])
+      self.iterations = self.cuts = 0
+      self.status = 'Feasible'
+      self.lower_bound = -np.inf
+      self.upper_bound = float(np.asarray(self.data.c, dtype=np.float64) @ y + theta.sum())
+      self.best = (x, y, q, theta)
+      with self.telemetry.phase('extract'):
+        self.extract_solution()
+
+  def iterate(self, tee):
+    with self.telemetry.phase('load'):
+      self.master = self.load(tee)
+    self.cuts = 0
+    self.iterations = 0
+    self.lower_bound = -np.inf
+    self.upper_bound = np.inf
+    self.best = None # (x, y, q, theta) of the best plan, theta the cost of each subproblem
+    n = np.asarray(self.data.n, dtype=np.float64)
+    c = np.asarray(self.data.c, dtype=np.float64)
+    deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+
+    def expired():
+      # Whether the time is up; otherwise the master gets what is left
+      if deadline is None:
+        return False
+      if time.perf_counter() >= deadline:
+        return True
+      self.master.setOptionValue('time_limit', deadline - time.perf_counter())
+      return False
+
+    def evaluate(x, y, q):
+      with self.telemetry.phase('subproblems'):
+        results = self.subproblems(q)
+      theta = np.array([result[0] for result in results])
+      value = float(c @ y + theta.sum())
+      if value < self.upper_bound:
+        self.upper_bound = value
+        self.best = (x, y, q, theta)
+        if self.on_incumbent is not None:
+          self.extract_solution()
+          self.on_incumbent(self.solution, self.lower_bound)
+      return results
+
+    if self.warm_start:
+      # The greedy plan gives the first upper bound and cuts
+      with self.telemetry.phase('heuristic'):
+        self.greedy = Greedy(self.data, self.arcs)
+      if self.greedy.feasible:
+        q = np.ceil(np.outer(self.greedy.x, n) - 1e-9)
+        self.add_cuts(q, evaluate(self.greedy.x, self.greedy.y, q))
+
+    # LP phase: cuts at the fractional optima of the relaxed master, until its bound stops moving
+    continuous = np.zeros(self.theta_start, dtype=np.uint8)
+    self.master.changeColsIntegrality(self.theta_start, np.arange(self.theta_start, dtype=np.int32), continuous)
+    previous = -np.inf
+    while self.iterations < self.max_iterations and not expired():
+      self.iterations += 1
+      with self.telemetry.phase('master'):
+        self.master.run()
+      if self.master.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+        break
+      values = np.array(self.master.getSolution().col_value)
+      bound = self.master.getInfo().objective_function_value
+      self.lower_bound = max(self.lower_bound, bound) # the relaxed master is a relaxation too
+      q = values[self.q_start:self.theta_start].reshape(self.n_f, self.n_r)
+      with self.telemetry.phase('subproblems'):
+        results = self.subproblems(q)
+      if not self.add_cuts(q, results, values[self.theta_start:]) or bound - previous <= self.tolerance*max(1.0, abs(bound)):
+        break
+      previous = bound
+    self.master.changeColsIntegrality(self.theta_start, np.arange(self.theta_start, dtype=np.int32),
+      self.integrality[:self.theta_start].astype(np.uint8))
+
+    # MIP phase: each master optimum is a plan; its cuts cut it off unless its estimate was exact. The
+    # status is that of the check that ends the loop, not of the last master solve
+    status = None
+    while self.iterations < self.max_iterations and not expired():
+      self.iterations += 1
+      if self.best is not None:
+        self.set_start()
+      with self.telemetry.phase('master'):
+        self.master.run()
+      info = self.master.getInfo()
+      if self.master.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+        if self.master.getModelStatus() == highspy.HighsModelStatus.kTimeLimit:
+          self.lower_bound = max(self.lower_bound, info.mip_dual_bound)
+        status = self.master.modelStatusToString(self.master.getModelStatus())
+        break
+      self.lower_bound = max(self.lower_bound, info.mip_dual_bound)
+      values = np.array(self.master.getSolution().col_value)
+      x, y, q = np.rint(values[:self.y_start]), np.rint(values[self.y_start:self.q_start]), self.targets(values)
+      results = evaluate(x, y, q)
+      # Converged, or the plan's costs match the master's estimates so no cut separates it
+      if (self.upper_bound - self.lower_bound <= self.tolerance*max(1.0, abs(self.upper_bound)) or
+          not self.add_cuts(q, results, values[self.theta_start:])):
+        status = 'Optimal'
+        break
+    if status is None:
+      status = ('Time limit reached' if deadline is not None and time.perf_counter() >= deadline else
+        'Iteration limit reached')
+    self.telemetry.set('iterations', self.iterations)
+    self.telemetry.set('cuts', self.cuts)
+    self.telemetry.set('lower_bound', self.lower_bound)
+    self.telemetry.set('upper_bound', self.upper_bound)
+    self.status = status
+    self.telemetry.set('status', status)
+    with self.telemetry.phase('extract'):
+      self.extract_solution()
+
+  def set_start(self):
+    # The best plan, with each theta at its cost, satisfies every cut
+    x, y, q, theta = self.best
+    solution = highspy.HighsSolution()
+    solution.col_value = np.concatenate([x, y, q.ravel(), theta])
+    solution.value_valid = True
+    self.master.setSolution(solution)
+
+  def extract_solution(self):
+    self.gap = ((self.upper_bound - self.lower_bound)/max(1.0, abs(self.upper_bound))
+      if self.best is not None else np.inf)
+    self.objective_value = self.upper_bound
+    self.solution = None
+    if self.best is None:
+      return
+    x, y, q, _ = self.best
+    n_ei = len(self.data.E + self.data.I)
+    z = np.zeros((self.n_f, self.n_r))
+    w = np.zeros((self.n_f, n_ei))
+    v = np.zeros(len(self.arcs.j))
+    for j, (_, _, z_j, w_j, v_j) in enumerate(self.subproblems(q, primal=True)):
+      z[:, j] = z_j
+      if j < n_ei:
+        w[self.repairable[:, j], j] = w_j
+      v[self.arcs.j == j] = v_j
+    self.x, self.y, self.z, self.w, self.v = x, y, z, w, v
+    self.solution = Solution(self.data, self.objective_value, x, y, z, w, v, self.arcs.j, self.arcs.i,
+      self.arcs.l)
+
+  def print_results(self):
+    print('Benders: {}, {} iterations, {} cuts, bound {:,.2f}, best {} (gap {:.2%})'.format(self.status,
+      self.iterations, self.cuts, self.lower_bound, '-' if self.solution is None else '{:,.2f}'.format(self.objective_value),
+      self.gap))
+
+  def print_solution(self):
+    report.print_solution(self.solution)
+
+  def to_html(self):
+    return report.to_html(self.solution)
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import pickle
+import uuid
+
+from . import report
+
+# Solutions on disk, keyed by a hash of the instance contents and of the options that can change the
+# plan (engine, presolve, limits, ...), so re-solving an unchanged instance only reads a file. Entries
+# are pickled Solution objects; reading one refreshes its modification time, and writing one evicts
+# the least recently used entries until the cache fits in max_bytes
+
+CACHE_DIR = os.path.join('.cache', 'solutions')
+VERSION = 1 # bumped when Solution changes, so older entries are never read
+
+def solution_key(data, **options):
+  digest = hashlib.sha256()
+  digest.update(str(VERSION).encode())
+  digest.update(data.fingerprint().encode())
+  digest.update(json.dumps(options, sort_keys=True).encode())
+  return digest.hexdigest()
+
+class SolutionCache:
+  def __init__(self, cache_dir=CACHE_DIR, max_bytes=256*2**20):
+    self.cache_dir = cache_dir
+    self.max_bytes = max_bytes
+
+  def path(self, key):
+    return os.path.join(self.cache_dir, key + '.pickle')
+
+  def get(self, key):
+    path = self.path(key)
+    try:
+      with open(path, 'rb') as entry:
+        solution = pickle.load(entry)
+      os.utime(path)
+    except (OSError, EOFError, pickle.UnpicklingError):
+      return None
+    return solution
+
+  def put(self, key, solution):
+    os.makedirs(self.cache_dir, exist_ok=True)
+    # Write then rename, so a concurrent reader never sees a partial entry
+    path = os.path.join(self.cache_dir, '.{}.tmp'.format(uuid.uuid4().hex))
+    with open(path, 'wb') as entry:
+      pickle.dump(solution, entry, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path, self.path(key))
+    self.evict()
+
+  def entries(self):
+    # (mtime, size, path) of each entry, least recently used first
+    entries = []
+    for name in os.listdir(self.cache_dir):
+      if name.endswith('.pickle'):
+        try:
+          stat = os.stat(os.path.join(self.cache_dir, name))
+        except FileNotFoundError:
+          continue
+        entries.append((stat.st_mtime, stat.st_size, os.path.join(self.cache_dir, name)))
+    return sorted(entries)
+
+  def evict(self):
+    entries = self.entries()
+    size = sum(entry[1] for entry in entries)
+    for _, entry_size, path in entries[:-1]: # the newest entry always stays
+      if size <= self.max_bytes:
+        break
+      try:
+        os.remove(path)
+      except FileNotFoundError:
+        pass
+      size -= entry_size
+
+  def clear(self):
+    for _, _, path in self.entries() if os.path.isdir(self.cache_dir) else []:
+      os.remove(path)
+
+class CachedSolution:
+  # Stands in for a solved model: the reports only read the solution
+  presolve = None
+
+  def __init__(self, solution):
+    self.solution = solution
+
+  def print_solution(self):
+    report.print_solution(self.solution)
+
+  def to_html(self):
+    return report.to_html(self.solution)
@@ -0,0 +1,418 @@
+import argparse
+import os
+
+# Each command imports what it needs, so `--help` and `fetch --offline` never load the solver
+
+def read_instance(args, telemetry):
+  if not args.sheets:
+    from .data import Data
+    with telemetry.phase('parse'):
+      return Data(args.instance)
+  # The spreadsheet data, through the reader's snapshot cache, without an instance file
+  if args.demand is None:
+    raise SystemExit('--sheets needs --demand')
+  from .read_data import ReadData
+  from .sheets import to_data
+  with telemetry.phase('fetch'):
+    read_data = ReadData(offline=args.offline)
+  with telemetry.phase('parse'):
+    return to_data(read_data, args.demand, transfer_rates=args.transfer_rate)
+
+def build_model(args, telemetry):
+  data = read_instance(args, telemetry)
+  cache = key = None
+  if args.cache:
+    from .cache import CachedSolution, SolutionCache, solution_key
+    cache = SolutionCache(args.cache_dir, max_bytes=int(args.cache_size*2**20))
+    options = {'engine': args.engine, 'presolve': not args.no_presolve, 'warm_start': not args.no_warm_start}
+    options.update({name: value for name, value in [('neighbours', args.neighbours),
+      ('max_distance', args.max_distance), ('max_cost', args.max_cost), ('price_out', args.price_out or None)]
+      if value is not None})
+    if args.engine == 'portfolio':
+      options.update(workers=args.workers, time_limit=args.time_limit)
+    elif args.engine == 'benders':
+      options.update(workers=args.workers)
+    elif args.engine == 'aggregate':
+      options.update(workers=args.workers, region_size=args.region_size)
+    if args.engine in ('pyomo', 'matrix', 'benders'):
+      # A plan stopped at a limit is only reused under the same limits
+      options.update({name: value for name, value in [('time_limit', args.time_limit), ('gap', args.gap)]
+        if value is not None})
+    key = solution_key(data, **options)
+    with telemetry.phase('cache'):
+      solution = cache.get(key)
+    telemetry.set('cache_hit', int(solution is not None))
+    if solution is not None:
+      print('Solution reused from', cache.path(key))
+      return data, CachedSolution(solution)
+  model = solve_model(args, data, telemetry)
+  if cache is not None and model.solution is not None:
+    cache.put(key, model.solution)
+  return data, model
+
+def solve_model(args, data, telemetry):
+  if args.price_out and args.engine != 'matrix':
+    raise SystemExit('--price-out needs --engine matrix')
+  arcs = None
+  if args.neighbours is not None or args.max_distance is not None or args.max_cost is not None:
+    from .arcs import TransferArcs
+    with telemetry.phase('arcs'):
+      arcs = TransferArcs(data, k=args.neighbours, max_distance=args.max_distance, max_cost=args.max_cost)
+    arcs.report()
+  if args.engine == 'greedy':
+    # The heuristic plan alone, without the solver
+    from .heuristic import Greedy
+    with telemetry.phase('heuristic'):
+      model = Greedy(data, arcs)
+    if not model.feasible:
+      # Even opening every hospital leaves the demand uncovered
+      print('No feasible heuristic plan')
+      model.solution = None
+    return model
+  options = {'presolve': not args.no_presolve, 'warm_start': not args.no_warm_start}
+  snapshot = None
+  if args.snapshot:
+    if args.engine not in ('pyomo', 'matrix', 'benders'):
+      raise SystemExit('--snapshot needs --engine pyomo, matrix or benders')
+    from .snapshot import SnapshotWriter
+    snapshot = SnapshotWriter(args.snapshot, args.snapshot_interval)
+  if args.engine == 'matrix':
+    from .matrix_model import MatrixModel
+    model = MatrixModel(data, arcs, solve=False, telemetry=telemetry, time_limit=args.time_limit, gap=args.gap,
+      on_incumbent=snapshot, **options)
+  elif args.engine == 'portfolio':
+    from .portfolio import Portfolio
+    model = Portfolio(data, arcs, workers=args.workers, time_limit=args.time_limit, solve=False, telemetry=telemetry,
+      **options)
+  elif args.engine == 'benders':
+    from .benders import Benders
+    if args.gap is not None:
+      options.update(tolerance=args.gap)
+    model = Benders(data, arcs, workers=args.workers, solve=False, telemetry=telemetry, time_limit=args.time_limit,
+      on_incumbent=snapshot, **options)
+  elif args.engine == 'aggregate':
+    from .aggregate import Aggregation
+    model = Aggregation(data, arcs, region_size=args.region_size, workers=args.workers, solve=False,
+      telemetry=telemetry, **options)
+  else:
+    from .model import Model
+    model = Model(data, arcs, solve=False, telemetry=telemetry, time_limit=args.time_limit, gap=args.gap,
+      on_incumbent=snapshot, **options)
+  job = None
+  if args.export or args.export_cached:
+    job = model.export(args.export, background=args.export_in)
+  model.solve()
+  if args.price_out:
+    with telemetry.phase('price_out'):
+      added = model.price_out()
+    print('Price-out: {} pruned arcs with negative reduced cost added back (not certified optimal for the '
+      'unpruned model)'.format(added))
+  if job is not None:
+    print('Model {} {}'.format('reused from' if job.cached else 'written to', job.result()))
+  if args.engine in ('portfolio', 'benders', 'aggregate'):
+    model.print_results()
+  elif (args.time_limit is not None or args.gap is not None) and model.solution is not None:
+    from .snapshot import gap
+    print('Best {:,.2f}, bound {:,.2f} (gap {:.2%})'.format(model.solution.objective, model.lower_bound,
+      gap(model.solution.objective, model.lower_bound) or 0))
+  if snapshot is not None and model.solution is not None:
+    snapshot(model.solution, model.lower_bound)
+    snapshot.flush(final=True)
+    print('Snapshot written to', args.snapshot)
+  return model
+
+def model_file(filename):
+  from .export import check_format
+  try:
+    check_format(filename)
+  except ValueError as error:
+    raise argparse.ArgumentTypeError(str(error))
+  return filename
+
+def write_metrics(args, telemetry):
+  if args.metrics:
+    telemetry.write(args.metrics)
+    print('Metrics written to', args.metrics)
+
+def solve(args):
+  from .telemetry import Telemetry
+  telemetry = Telemetry(command='solve', instance=args.instance, engine=args.engine)
+  data, model = build_model(args, telemetry)
+  if getattr(model, 'presolve', None) is not None:
+    model.presolve.report()
+  if model.solution is None:
+    print('No plan found')
+    write_metrics(args, telemetry)
+    return
+  with telemetry.phase('render'):
+    model.print_solution()
+  if args.sensitivity:
+    from .sensitivity import analyze
+    with telemetry.phase('sensitivity'):
+      sensitivity = analyze(data, model.solution, presolve=not args.no_presolve)
+    sensitivity.print_report()
+    sensitivity.save(args.sensitivity)
+    print('Sensitivity written to', args.sensitivity)
+  write_metrics(args, telemetry)
+
+def render(args):
+  from . import report
+  from .telemetry import Telemetry
+  telemetry = Telemetry(command='render', instance=args.instance, engine=args.engine)
+  _, model = build_model(args, telemetry)
+  if model.solution is None:
+    print('No plan found')
+    write_metrics(args, telemetry)
+    return
+  with telemetry.phase('render'):
+    if args.pages:
+      pages = report.write_html_pages(model.solution, args.output)
+    else:
+      with open(args.output, 'w') as file:
+        report.write_html(model.solution, file, collapsible=args.collapse)
+  if args.pages:
+    print('Report written to', args.output, 'and', len(pages), 'hospital pages')
+  else:
+    print('Report written to', args.output)
+  write_metrics(args, telemetry)
+
+def what_if(args):
+  import re
+  from .sensitivity import load
+  sensitivity = load(args.sensitivity)
+  for query in args.queries:
+    match = re.fullmatch(r'\s*(d|p\[(\d+)\]|a\[(\d+),\s*(\d+)\])\s*=\s*([-+0-9.eE]+)\s*', query)
+    if match is None:
+      raise SystemExit('invalid what-if {!r}: expected d=VALUE, p[j]=VALUE or a[i,j]=VALUE'.format(query))
+    value = float(match.group(5))
+    # A price answer re-prices the current plan, which stays feasible, so it bounds the new optimum from
+    # above; the LP's continuous beds and units make the others estimates
+    upper_bound = match.group(2) is not None
+    if match.group(1) == 'd':
+      cost = sensitivity.what_if_demand(value)
+    elif match.group(2) is not None:
+      cost = sensitivity.what_if_price(int(match.group(2)), value)
+    else:
+      cost = sensitivity.what_if_available(int(match.group(3)), int(match.group(4)), value)
+    if cost is None:
+      print('{}: outside the stored ranges, re-solve'.format(query))
+    elif upper_bound:
+      print('{}: <={:,.2f} ({:+,.2f}, upper bound)'.format(query, cost, cost - sensitivity.objective))
+    else:
+      print('{}: ~{:,.2f} ({:+,.2f}, estimate)'.format(query, cost, cost - sensitivity.objective))
+
+def sweep(args):
+  from . import sweep
+  from .data import Data
+  if ':' in args.demands:
+    start, stop, step = (args.demands.split(':') + ['1'])[:3]
+    demands = range(int(start), int(stop) + 1, int(step))
+  else:
+    demands = [int(d) for d in args.demands.split(',')]
+  rows = sweep.sweep(Data(args.instance), demands, workers=args.workers)
+  sweep.print_table(rows)
+  if args.csv:
+    sweep.write_csv(rows, args.csv)
+    print('Table written to', args.csv)
+  if args.plot:
+    try:
+      sweep.plot(rows, args.plot)
+    except ImportError:
+      print('matplotlib is required for --plot')
+    else:
+      print('Plot written to', args.plot)
+
+def batch(args):
+  from . import batch
+  paths = batch.instances(args.instances)
+  if not paths:
+    raise SystemExit('no instance files in ' + ', '.join(args.instances))
+  rows = batch.batch(paths, args.output_dir, engine=args.engine, workers=args.workers,
+    time_limit=args.time_limit, gap=args.gap, presolve=not args.no_presolve, warm_start=not args.no_warm_start,
+    export=args.export_models)
+  batch.print_table(rows)
+  print('Reports written to', args.output_dir)
+  if args.csv:
+    batch.write_csv(rows, args.csv)
+    print('Table written to', args.csv)
+
+def convert(args):
+  from .data import Data
+  Data(args.instance).save(args.output)
+  print('Instance written to', args.output)
+
+def generate(args):
+  from .generate import generate
+  data = generate(args.facilities, args.equipments, args.infrastructure, args.staff,
+    built_fraction=args.built_fraction, demand_tightness=args.demand_tightness,
+    transfer_costs=args.transfer_costs, seed=args.seed)
+  data.save(args.output)
+  print('Instance written to', args.output)
+
+def fetch(args):
+  from .read_data import ReadData
+  from .telemetry import Telemetry
+  telemetry = Telemetry(command='fetch')
+  with telemetry.phase('fetch'):
+    read_data = ReadData(cache_dir=args.cache_dir, offline=args.offline, refresh=args.refresh)
+  if read_data.revision is not None:
+    telemetry.set('revision', read_data.revision)
+  print('Revision:', read_data.revision)
+  print('Hospitals:', len(read_data.get_hospital_ids()))
+  print('Equipments:', len(read_data.get_equipment_ids()))
+  print('Staff:', len(read_data.get_staff_ids()))
+  print('Consumables:', len(read_data.get_consumable_ids()))
+  write_metrics(args, telemetry)
+
+def serve(args):
+  from .service import serve
+  serve(args.host, args.port, workers=args.workers, queue_size=args.queue_size, time_limit=args.time_limit,
+    scratch_dir=args.scratch_dir)
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(prog='min-costs-icu-beds',
+    description='Minimize the costs for the allocation of ICU beds.')
+  subparsers = parser.add_subparsers(dest='command', required=True)
+
+  # Instance, engine, export and cache options of solve and render
+  options = argparse.ArgumentParser(add_help=False)
+  options.add_argument('instance', nargs='?', default='instances/mock.txt')
+  options.add_argument('--sheets', action='store_true',
+    help='solve the Google Sheets data (see fetch) instead of an instance file')
+  options.add_argument('--demand', type=int, help='ICU beds to allocate, with --sheets')
+  options.add_argument('--offline', action='store_true', help='with --sheets, use the newest snapshot')
+  options.add_argument('--transfer-rate', type=float, default=1.0,
+    help='with --sheets, cost of moving one unit one coordinate unit')
+  options.add_argument('--engine', choices=['pyomo', 'matrix', 'greedy', 'portfolio', 'benders', 'aggregate'],
+    default='pyomo', help='greedy prints the heuristic plan without solving the model; portfolio races '
+    'several solver configurations in parallel; benders decomposes the model by requirement; aggregate '
+    'solves a model of regions, then each region')
+  options.add_argument('--workers', type=int, default=None,
+    help='portfolio, benders or aggregate worker processes (default: one per core)')
+  options.add_argument('--region-size', type=int, default=20,
+    help='with --engine aggregate, most hospitals in a region')
+  options.add_argument('--time-limit', type=float, default=None,
+    help='seconds after which the pyomo, matrix, portfolio or benders solve stops with the best plan found')
+  options.add_argument('--gap', type=float, default=None,
+    help='relative gap at which the pyomo, matrix or benders solve stops')
+  options.add_argument('--snapshot', metavar='FILE',
+    help='rewrite FILE with each better plan during the solve: an HTML report for .html, JSON with the plan, '
+    'its bound and gap otherwise (pyomo, matrix or benders)')
+  options.add_argument('--snapshot-interval', type=float, default=1.0, metavar='SECONDS',
+    help='least time between two snapshots')
+  options.add_argument('--neighbours', type=int, default=None, metavar='K',
+    help='only create transfers between each hospital and its K nearest neighbours')
+  options.add_argument('--max-distance', type=float, default=None,
+    help='only create transfers between hospitals at most this far apart (transfer cost without coordinates)')
+  options.add_argument('--max-cost', type=float, default=None,
+    help='only create transfers that cost at most this much per unit')
+  options.add_argument('--price-out', action='store_true',
+    help='with --engine matrix, add back the pruned transfers the LP duals of the plan price as worth it '
+    'and re-solve (a heuristic, not a proof of optimality)')
+  options.add_argument('--no-warm-start', action='store_true',
+    help='do not start the solver from the greedy plan')
+  options.add_argument('--no-presolve', action='store_true',
+    help='build every variable, including those the data fixes at zero')
+  export = options.add_mutually_exclusive_group()
+  export.add_argument('--export', metavar='FILE', type=model_file, help='write the model to FILE (.lp, .mps, .lp.gz or .mps.gz)')
+  export.add_argument('--export-cached', action='store_true',
+    help='write the model to .cache/models, keyed by instance and presolve, unless it is already there')
+  options.add_argument('--export-in', choices=['thread', 'process'],
+    help='write the model in the background while solving')
+  options.add_argument('--cache', action='store_true',
+    help='reuse the solution of an earlier run with the same instance and options, or store this one')
+  options.add_argument('--cache-dir', default=os.path.join('.cache', 'solutions'))
+  options.add_argument('--cache-size', type=float, default=256, metavar='MB',
+    help='size above which the least recently used solutions are evicted')
+  options.add_argument('--metrics', metavar='FILE',
+    help='write phase timings and solver statistics to FILE (Prometheus text for .prom, JSON otherwise)')
+
+  solve_parser = subparsers.add_parser('solve', parents=[options],
+    help='solve an instance and print the prescribed actions')
+  solve_parser.add_argument('--sensitivity', metavar='FILE',
+    help='with the openings of the plan fixed, report the marginal costs of demand, prices and availability '
+    'and the ranges where they hold, and store them in FILE (JSON) for what-if')
+  solve_parser.set_defaults(func=solve)
+
+  render_parser = subparsers.add_parser('render', parents=[options], help='solve an instance and write the HTML report')
+  render_parser.add_argument('-o', '--output', default='output.html')
+  layout = render_parser.add_mutually_exclusive_group()
+  layout.add_argument('--collapse', action='store_true', help='fold the actions of each hospital')
+  layout.add_argument('--pages', action='store_true', help='write one page per hospital next to the report')
+  render_parser.set_defaults(func=render)
+
+  what_if_parser = subparsers.add_parser('what-if',
+    help='upper bound on the cost after a change of price, or estimated cost after a change of demand or '
+    'availability, from a sensitivity file')
+  what_if_parser.add_argument('sensitivity', help='file written by solve --sensitivity')
+  what_if_parser.add_argument('queries', nargs='+', metavar='QUERY',
+    help='d=BEDS, p[j]=PRICE or a[i,j]=UNITS')
+  what_if_parser.set_defaults(func=what_if)
+
+  sweep_parser = subparsers.add_parser('sweep', help='minimum cost for each demand level of a grid')
+  sweep_parser.add_argument('instance', nargs='?', default='instances/mock.txt')
+  sweep_parser.add_argument('--demands', required=True,
+    help='START:STOP[:STEP] (inclusive) or a comma-separated list of demand levels')
+  sweep_parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+  sweep_parser.add_argument('--csv', help='write the table to this CSV file')
+  sweep_parser.add_argument('--plot', help='write a cost-vs-demand plot to this image file (needs matplotlib)')
+  sweep_parser.set_defaults(func=sweep)
+
+  batch_parser = subparsers.add_parser('batch', help='solve many instances in parallel and summarize them')
+  batch_parser.add_argument('instances', nargs='+', metavar='INSTANCES',
+    help='instance files, directories of instances (.txt, .npz or .json) or quoted glob patterns')
+  batch_parser.add_argument('-o', '--output-dir', default='batch',
+    help='parent of the per-instance directories for output.html, solution.json and metrics.json')
+  batch_parser.add_argument('--engine', choices=['matrix', 'pyomo', 'benders'], default='matrix')
+  batch_parser.add_argument('--workers', type=int, default=None,
+    help='instances solved at once (default: one per core)')
+  batch_parser.add_argument('--time-limit', type=float, default=None, help='seconds per instance')
+  batch_parser.add_argument('--gap', type=float, default=None, help='relative gap at which each solve stops')
+  batch_parser.add_argument('--no-warm-start', action='store_true',
+    help='do not start the solver from the greedy plan')
+  batch_parser.add_argument('--no-presolve', action='store_true',
+    help='build every variable, including those the data fixes at zero')
+  batch_parser.add_argument('--export-models', action='store_true',
+    help='also write each model to model.lp in its directory')
+  batch_parser.add_argument('--csv', help='write the summary table to this CSV file')
+  batch_parser.set_defaults(func=batch)
+
+  convert_parser = subparsers.add_parser('convert',
+    help='convert an instance between the text and the binary (.npz) formats')
+  convert_parser.add_argument('instance')
+  convert_parser.add_argument('output')
+  convert_parser.set_defaults(func=convert)
+
+  generate_parser = subparsers.add_parser('generate', help='write a random instance (text or .npz format)')
+  generate_parser.add_argument('output')
+  generate_parser.add_argument('-f', '--facilities', type=int, default=10)
+  generate_parser.add_argument('-e', '--equipments', type=int, default=3)
+  generate_parser.add_argument('-i', '--infrastructure', type=int, default=2)
+  generate_parser.add_argument('-s', '--staff', type=int, default=2)
+  generate_parser.add_argument('--built-fraction', type=float, default=0.5, help='share of facilities already built')
+  generate_parser.add_argument('--demand-tightness', type=float, default=0.5,
+    help='demand as a fraction of the total bed capacity')
+  generate_parser.add_argument('--transfer-costs', choices=['distance', 'uniform'], default='distance')
+  generate_parser.add_argument('--seed', type=int, default=0)
+  generate_parser.set_defaults(func=generate)
+
+  fetch_parser = subparsers.add_parser('fetch', help='download the spreadsheet data into the local snapshot cache')
+  fetch_parser.add_argument('--cache-dir', default='.cache')
+  fetch_parser.add_argument('--offline', action='store_true', help='load the newest snapshot without network access')
+  fetch_parser.add_argument('--refresh', action='store_true', help='ignore cached snapshots')
+  fetch_parser.add_argument('--metrics', metavar='FILE',
+    help='write phase timings and solver statistics to FILE (Prometheus text for .prom, JSON otherwise)')
+  fetch_parser.set_defaults(func=fetch)
+
+  serve_parser = subparsers.add_parser('serve', help='solve posted instances over a local HTTP/JSON service')
+  serve_parser.add_argument('--host', default='127.0.0.1')
+  serve_parser.add_argument('--port', type=int, default=8080)
+  serve_parser.add_argument('--workers', type=int, default=None, help='solver processes (default: one per core)')
+  serve_parser.add_argument('--queue-size', type=int, default=16, help='jobs that can wait for a worker')
+  serve_parser.add_argument('--time-limit', type=float, default=None,
+    help='default and maximum solve time per job, in seconds')
+  serve_parser.add_argument('--scratch-dir', help='parent of the job directories (default: a temporary directory)')
+  serve_parser.set_defaults(func=serve)
+
+  args = parser.parse_args(argv)
+  args.func(args)
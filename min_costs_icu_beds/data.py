@@ -0,0 +1,156 @@
+import hashlib
+import json
+
+import numpy as np
+
+class Data:
+  def __init__(self, filename=None):
+    # Text instances (see instances/mock-commented.txt), the binary .npz format written by save() or
+    # the same arrays as a JSON object; without a filename the attributes are left for the caller to
+    # set (see generate.py)
+    self.C = [] # C: set of consumables, only acquired; optional in every format
+    if filename is None:
+      return
+    if str(filename).endswith('.npz'):
+      self.read_npz(filename)
+    elif str(filename).endswith('.json'):
+      self.read_json(filename)
+    else:
+      self.read_text(filename)
+
+  def read_text(self, filename):
+    with open(filename) as file_object:
+      text = file_object.read()
+    if '#' in text:
+      text = '\n'.join(line.split('#', 1)[0] for line in text.splitlines())
+    lines = text.split('\n', 10)
+    self.F = list(range(int(lines[0]))) # F: set of facilities
+    self.K = [int(n) for n in lines[1].split()] # K: built facilities
+    n_req = 0
+    req = []
+    for n in lines[2].split():
+      req.append(list(range(n_req, n_req + int(n))))
+      n_req += int(n)
+    self.E, self.I, self.S = req[:3] # E: set of equipments; I: set of infrastructure; S: set of staff
+    self.C = req[3] if len(req) > 3 else []
+    self.d = int(lines[3]) # d: demand of ICU beds
+    self.c = np.array(lines[4].split(), dtype=np.float64) # c: cost of building facilities
+    self.c[self.K] = 0
+    self.l = np.array(lines[5].split(), dtype=np.int64) # l: lower bound of ICU beds in each facility, if built
+    self.u = np.array(lines[6].split(), dtype=np.int64) # u: upper bound of ICU beds in each facility
+    self.p = np.array(lines[7].split(), dtype=np.float64) # p: price of each requirement
+    self.r = np.array(lines[8].split(), dtype=np.float64) # r: repair price of each requirement (equipments and infrastructure)
+    self.n = np.array(lines[9].split(), dtype=np.float64) # n: necessary rate of each requirement per ICU bed
+
+    # The remaining blocks have fixed sizes, so they are parsed as one flat array and sliced
+    n_f, n_k, n_ei = len(self.F), len(self.K), len(self.E + self.I)
+    values = np.fromstring(lines[10] if len(lines) > 10 else '', dtype=np.float64, sep=' ')
+    self.a = np.zeros((n_f, n_req), dtype=np.int64) # a: availability of each working requirement in each facility
+    self.a[self.K] = values[:n_k*n_req].reshape(n_k, n_req)
+    values = values[n_k*n_req:]
+    self.m = np.zeros((n_f, n_ei), dtype=np.int64) # m: number of units of each requirement in need of repair
+    self.m[self.K] = values[:n_k*n_ei].reshape(n_k, n_ei)
+    values = values[n_k*n_ei:]
+    self.t = np.zeros((n_req, n_f, n_f)) # t: transfer cost of each requirement among hospitals (zero for infrastructure)
+    transferable = self.E + self.S
+    self.t[transferable] = values[:len(transferable)*n_f*n_f].reshape(len(transferable), n_f, n_f)
+    values = values[len(transferable)*n_f*n_f:]
+    self.coords = values.reshape(n_f, 2) if len(values) else None # coords: optional (x, y) position of each facility
+
+  def read_npz(self, filename):
+    with np.load(filename) as arrays:
+      self.read_arrays(arrays)
+
+  def read_json(self, filename):
+    with open(filename) as file_object:
+      self.read_arrays(json.load(file_object))
+
+  def read_arrays(self, arrays):
+    # The .npz layout: n_facilities, K, sizes (|E|, |I|, |S| and optionally |C|), d, c, l, u, p, r, n, a,
+    # m, t and optionally coords, with a, m and t dense over every facility
+    n_e, n_i, n_s, n_c = (np.asarray(arrays['sizes']).tolist() + [0])[:4]
+    self.F = list(range(int(arrays['n_facilities'])))
+    self.K = np.asarray(arrays['K'], dtype=np.int64).tolist()
+    self.E = list(range(n_e))
+    self.I = list(range(n_e, n_e + n_i))
+    self.S = list(range(n_e + n_i, n_e + n_i + n_s))
+    self.C = list(range(n_e + n_i + n_s, n_e + n_i + n_s + n_c))
+    self.d = int(arrays['d'])
+    for name, dtype in [('c', np.float64), ('l', np.int64), ('u', np.int64), ('p', np.float64), ('r', np.float64),
+        ('n', np.float64), ('a', np.int64), ('m', np.int64), ('t', np.float64)]:
+      setattr(self, name, np.asarray(arrays[name], dtype=dtype))
+    self.coords = np.asarray(arrays['coords'], dtype=np.float64) if arrays.get('coords') is not None else None
+
+  def to_arrays(self):
+    sizes = [len(self.E), len(self.I), len(self.S)] + ([len(self.C)] if self.C else [])
+    arrays = {'n_facilities': len(self.F), 'K': np.array(self.K, dtype=np.int64), 'sizes': np.array(sizes),
+      'd': self.d, 'c': self.c, 'l': self.l, 'u': self.u, 'p': self.p, 'r': self.r, 'n': self.n, 'a': self.a,
+      'm': self.m, 't': self.t}
+    if self.coords is not None:
+      arrays['coords'] = self.coords
+    return arrays
+
+  def save(self, filename):
+    # .npz files hold the arrays as-is and load without parsing, .json files hold them as lists; any
+    # other name gets the text format
+    if str(filename).endswith('.npz'):
+      with open(filename, 'wb') as file_object:
+        np.savez(file_object, **self.to_arrays())
+      return
+    if str(filename).endswith('.json'):
+      with open(filename, 'w') as file_object:
+        json.dump({name: np.asarray(values).tolist() for name, values in self.to_arrays().items()}, file_object)
+      return
+    with open(filename, 'w') as file_object:
+      file_object.write('{}\n'.format(len(self.F)))
+      file_object.write(_format_line(self.K))
+      file_object.write(_format_line([len(self.E), len(self.I), len(self.S)] + ([len(self.C)] if self.C else [])))
+      file_object.write('{}\n'.format(self.d))
+      for values in [self.c, self.l, self.u, self.p, self.r, self.n]:
+        file_object.write(_format_line(values))
+      for values in [self.a, self.m]:
+        for i in self.K:
+          file_object.write(_format_line(values[i]))
+      for j in self.E + self.S:
+        for i in self.F:
+          file_object.write(_format_line(self.t[j][i]))
+      if self.coords is not None:
+        for i in self.F:
+          file_object.write(_format_line(self.coords[i]))
+
+  def fingerprint(self):
+    # sha256 of the instance contents, the same whichever format (text or .npz) it was read from
+    digest = hashlib.sha256()
+    sizes = [len(self.F), len(self.E), len(self.I), len(self.S), self.d] + ([len(self.C)] if self.C else [])
+    digest.update(np.array(sizes, dtype=np.int64).tobytes())
+    for values in [self.K, self.c, self.l, self.u, self.p, self.r, self.n, self.a, self.m, self.t, self.coords]:
+      if values is None:
+        digest.update(b'-')
+        continue
+      values = np.ascontiguousarray(values, dtype=np.float64)
+      digest.update(np.array(values.shape, dtype=np.int64).tobytes())
+      digest.update(values.tobytes())
+    return digest.hexdigest()
+
+  def print_data(self):
+    print('F:', self.F)
+    print('K:', self.K)
+    print('E:', self.E)
+    print('I:', self.I)
+    print('S:', self.S)
+    print('C:', self.C)
+    print('d:', self.d)
+    print('c:', self.c)
+    print('l:', self.l)
+    print('u:', self.u)
+    print('p:', self.p)
+    print('r:', self.r)
+    print('n:', self.n)
+    print('a:', self.a)
+    print('m:', self.m)
+    print('t:', self.t)
+    if self.coords is not None:
+      print('coords:', self.coords)
+
+def _format_line(values):
+  return ' '.join(str(int(n)) if float(n).is_integer() else repr(float(n)) for n in values) + '\n'
@@ -0,0 +1,100 @@
+import concurrent.futures
+import gzip
+import hashlib
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+# Export of a built model as LP or MPS, optionally gzipped (model.lp, model.mps.gz, ...). The file can be
+# written in the calling thread, in a background thread or in a separate process that rebuilds the
+# model from its data, so the export overlaps the solve. Without a filename the file is a cached
+# artifact named after the engine, the instance, the presolve and the transfer arcs, and is only written
+# once
+
+FORMATS = ['.lp', '.mps', '.lp.gz', '.mps.gz']
+CACHE_DIR = os.path.join('.cache', 'models')
+
+def model_key(model):
+  # The presolve decides which repair and transfer variables exist, so whether it ran and what it
+  # dropped are part of the key
+  digest = hashlib.sha256()
+  digest.update(type(model).__name__.encode())
+  digest.update(model.data.fingerprint().encode())
+  for values in [model.arcs.j, model.arcs.i, model.arcs.l]:
+    digest.update(np.ascontiguousarray(values, dtype=np.int64).tobytes())
+  presolve = model.presolve
+  digest.update(b'presolve' if presolve is not None else b'no presolve')
+  if presolve is not None:
+    for mask in [presolve.repairable, presolve.cut]:
+      digest.update(str(mask.shape).encode())
+      digest.update(np.packbits(mask).tobytes())
+  return digest.hexdigest()
+
+def check_format(filename):
+  if not any(str(filename).endswith(extension) for extension in FORMATS):
+    raise ValueError('unsupported model format {!r} (use one of {})'.format(str(filename), ', '.join(FORMATS)))
+
+def write_file(write, filename):
+  # write(path) writes the uncompressed model, whose format the writers take from the extension; it
+  # goes to a temporary file next to the target and is compressed or renamed into place, so a
+  # cached file is never seen half written
+  filename = str(filename)
+  compressed = filename.endswith('.gz')
+  extension = os.path.splitext(filename[:-3] if compressed else filename)[1]
+  directory = os.path.dirname(filename) or '.'
+  os.makedirs(directory, exist_ok=True)
+  path = os.path.join(directory, '.{}{}'.format(uuid.uuid4().hex, extension))
+  try:
+    write(path)
+    if compressed:
+      with open(path, 'rb') as source, gzip.open(path + '.gz', 'wb') as target:
+        shutil.copyfileobj(source, target)
+      os.remove(path)
+      path += '.gz'
+    os.replace(path, filename)
+  finally:
+    if os.path.exists(path):
+      os.remove(path)
+
+def _rebuild_and_write(engine, data, arcs, filename):
+  write_file(engine(data, arcs, solve=False).write_model, filename)
+
+class ExportJob:
+  def __init__(self, path, future=None, cached=False):
+    self.path = path
+    self.future = future
+    self.cached = cached
+
+  def done(self):
+    return self.future is None or self.future.done()
+
+  def result(self):
+    # Waits for a background export and raises its error, if any
+    if self.future is not None:
+      self.future.result()
+    return self.path
+
+def export_model(model, filename=None, background=None, cache_dir=CACHE_DIR, format='.lp.gz'):
+  # background: None (write now), 'thread' or 'process'
+  cached = filename is None
+  if cached:
+    filename = os.path.join(cache_dir, model_key(model) + format)
+    if os.path.exists(filename):
+      return ExportJob(filename, cached=True)
+  check_format(filename)
+  if background is None:
+    with model.telemetry.phase('export'):
+      write_file(model.write_model, filename)
+    return ExportJob(filename, cached=cached)
+  if background == 'thread':
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(write_file, model.write_model, filename)
+  elif background == 'process':
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+    future = executor.submit(_rebuild_and_write, type(model), model.data, model.arcs, filename)
+  else:
+    raise ValueError("background must be None, 'thread' or 'process'")
+  executor.shutdown(wait=False)
+  return ExportJob(filename, future, cached=cached)
@@ -0,0 +1,58 @@
+import numpy as np
+
+from .data import Data
+
+# Random instances in the ranges of instances/mock.txt, for benchmarks and experiments. Facilities
+# are points in the unit square; the same seed always gives the same instance
+
+TRANSFER_COSTS = ['distance', 'uniform']
+
+def generate(n_facilities, n_equipments=3, n_infrastructure=2, n_staff=2, built_fraction=0.5,
+    demand_tightness=0.5, transfer_costs='distance', seed=0):
+  # demand_tightness is the demand as a fraction of the total capacity sum(u); transfer_costs is
+  # 'distance' (a per-requirement rate times the distance between the facilities) or 'uniform'
+  # (independent random costs, which need not satisfy the triangle inequality)
+  if not 0 < demand_tightness <= 1:
+    raise ValueError('demand_tightness must be in (0, 1]')
+  if transfer_costs not in TRANSFER_COSTS:
+    raise ValueError('transfer_costs must be one of {}'.format(', '.join(TRANSFER_COSTS)))
+  rng = np.random.default_rng(seed)
+  n_f = n_facilities
+  n_ei = n_equipments + n_infrastructure
+  n_req = n_ei + n_staff
+
+  data = Data()
+  data.F = list(range(n_f))
+  n_k = min(n_f, max(1, int(round(built_fraction*n_f))))
+  data.K = sorted(rng.choice(n_f, size=n_k, replace=False).tolist())
+  data.E = list(range(n_equipments))
+  data.I = list(range(n_equipments, n_ei))
+  data.S = list(range(n_ei, n_req))
+  data.C = []
+  data.c = rng.integers(5, 21, size=n_f).astype(np.float64)*100000
+  data.c[data.K] = 0
+  data.l = rng.integers(5, 11, size=n_f)
+  data.u = data.l + rng.integers(5, 21, size=n_f)
+  data.d = max(1, int(round(demand_tightness*data.u.sum())))
+  data.p = rng.integers(1, 301, size=n_req).astype(np.float64)*100
+  data.r = np.floor(data.p[:n_ei]*rng.uniform(0.02, 0.2, size=n_ei))
+  data.n = rng.choice([0.1, 0.15, 0.2, 0.25, 0.4, 0.5, 1.0], size=n_req)
+
+  # Built facilities hold around one bed's worth of requirements per bed of their lower bound
+  data.a = np.zeros((n_f, n_req), dtype=np.int64)
+  data.a[data.K] = np.rint(data.n*data.l[data.K, None]*rng.uniform(0.5, 2, size=(n_k, n_req)))
+  data.m = np.zeros((n_f, n_ei), dtype=np.int64)
+  data.m[data.K] = rng.integers(0, 4, size=(n_k, n_ei))
+
+  data.coords = np.round(rng.random((n_f, 2)), 4)
+  data.t = np.zeros((n_req, n_f, n_f))
+  transferable = data.E + data.S
+  if transfer_costs == 'distance':
+    distance = np.sqrt(((data.coords[:, None, :] - data.coords[None, :, :])**2).sum(axis=2))
+    rate = rng.integers(1, 51, size=len(transferable))*100
+    data.t[transferable] = np.rint(rate[:, None, None]*distance)
+  else:
+    costs = rng.integers(1, 501, size=(len(transferable), n_f, n_f)).astype(np.float64)
+    costs = np.triu(costs, 1)
+    data.t[transferable] = costs + costs.transpose(0, 2, 1)
+  return data
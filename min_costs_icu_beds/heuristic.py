@@ -0,0 +1,130 @@
+import numpy as np
+
+from . import report
+from .arcs import TransferArcs
+from .solution import Solution
+
+# Constructive plan for the same model, in two steps:
+# 1. Beds. With the requirements covered at each facility by its own units, then repairs, then
+#    purchases, the cost of b beds is convex in b, so the d cheapest marginal beds over the open
+#    facilities give the allocation. Built facilities (K) are open and take at least l beds; new
+#    facilities are opened, cheapest cost per bed at full capacity (c[i] plus the requirements of u[i]
+#    beds, over u[i]) first, only while the open capacity is short of d.
+# 2. Requirements. Each facility's shortfall of a requirement is covered from the cheapest of repairs
+#    (where m allows), transfers of the surplus of other facilities along the given arcs and, for the
+#    rest, purchases.
+# Everything but the last step is vectorized, so a plan for thousands of facilities takes well under a
+# second. The plan is feasible for the engines built on the same arcs and serves as their MIP start.
+
+class Greedy:
+  def __init__(self, data, arcs=None):
+    self.data = data
+    self.arcs = arcs if arcs is not None else TransferArcs(data)
+    n_f = len(data.F)
+    n_ei = len(data.E + data.I)
+    self.a = a = np.asarray(data.a, dtype=np.float64)
+    self.repair_cost = np.zeros_like(a) # r per unit, capped at m
+    self.repair_cap = np.zeros_like(a)
+    self.repair_cost[:, :n_ei] = np.asarray(data.r, dtype=np.float64)[:n_ei]
+    self.repair_cap[:, :n_ei] = np.asarray(data.m, dtype=np.float64)[:, :n_ei]
+    self.p = np.asarray(data.p, dtype=np.float64)
+    self.n = np.asarray(data.n, dtype=np.float64)
+    self.l = np.asarray(data.l, dtype=np.int64)
+    self.u = np.asarray(data.u, dtype=np.int64)
+    c = np.asarray(data.c, dtype=np.float64)
+
+    self.y = np.zeros(n_f)
+    self.y[data.K] = 1
+    beds = self.bed_costs() # (F, max u + 1): cost of the requirements of b beds
+    capacity = self.u[data.K].sum()
+    if capacity < data.d:
+      closed = np.setdiff1d(np.arange(n_f), data.K)
+      per_bed = (c[closed] + beds[closed, self.u[closed]])/np.maximum(self.u[closed], 1)
+      for i in closed[np.argsort(per_bed, kind='stable')]:
+        if capacity >= data.d:
+          break
+        self.y[i] = 1
+        capacity += self.u[i]
+    self.feasible = capacity >= data.d
+    self.x = self.allocate(beds)
+    self.cover()
+    self.objective = float(c @ self.y + (self.z*self.p).sum() + (self.w*self.repair_cost[:, :n_ei]).sum() +
+      (self.v*self.data.t[self.arcs.j, self.arcs.i, self.arcs.l]).sum())
+    self.solution = Solution(data, self.objective, self.x, self.y, self.z, self.w, self.v, self.arcs.j,
+      self.arcs.i, self.arcs.l)
+
+  def bed_costs(self):
+    # Requirements of b beds bought after the facility's own units and the repairs (cheaper ones first),
+    # with fractional amounts so the cost is convex in b
+    b = np.arange(self.u.max() + 1, dtype=np.float64)
+    need = np.maximum(self.n[np.newaxis, np.newaxis, :]*b[np.newaxis, :, np.newaxis] - self.a[:, np.newaxis, :], 0)
+    cheaper = self.repair_cost < self.p # repairs that beat buying
+    repaired = np.minimum(need, np.where(cheaper, self.repair_cap, 0)[:, np.newaxis, :])
+    return (repaired*self.repair_cost[:, np.newaxis, :] + (need - repaired)*self.p).sum(axis=2)
+
+  def allocate(self, beds):
+    # The d cheapest marginal beds of the open facilities, with their first l beds (at least one, as
+    # y <= x) forced in
+    n_f, width = beds.shape
+    marginal = np.diff(beds, axis=1) # marginal[i, b - 1]: cost of bed b
+    bed = np.arange(1, width)[np.newaxis, :]
+    open_ = self.y[:, np.newaxis] > 0
+    marginal[open_ & (bed <= np.maximum(self.l, 1)[:, np.newaxis])] = -np.inf
+    marginal[~open_ | (bed > self.u[:, np.newaxis])] = np.inf
+    forced = int(np.isneginf(marginal).sum())
+    available = int(np.isfinite(marginal).sum()) + forced
+    take = min(max(int(self.data.d), forced), available)
+    selected = np.zeros(marginal.size, dtype=bool)
+    if take:
+      selected[np.argpartition(marginal.ravel(), take - 1)[:take]] = True
+    # Marginal costs grow with b, so the count per facility is the allocation
+    return selected.reshape(marginal.shape).sum(axis=1).astype(np.float64)
+
+  def cover(self):
+    data = self.data
+    n_f, n_r = self.a.shape
+    n_ei = len(data.E + data.I)
+    need = np.ceil(self.n*self.x[:, np.newaxis] - 1e-9)
+    shortfall = np.maximum(need - self.a, 0)
+    surplus = np.maximum(self.a - need, 0)
+    self.w = np.zeros((n_f, n_ei))
+    self.v = np.zeros(len(self.arcs.j))
+    t = data.t[self.arcs.j, self.arcs.i, self.arcs.l]
+    for j in range(n_r):
+      # Options with unit cost below the purchase price: repairs at the facility, transfers into it
+      rows = np.nonzero(shortfall[:, j] > 0)[0]
+      if not len(rows):
+        continue
+      repair = rows[(self.repair_cap[rows, j] > 0) & (self.repair_cost[rows, j] < self.p[j])]
+      arcs = np.nonzero((self.arcs.j == j) & (shortfall[self.arcs.l, j] > 0) & (surplus[self.arcs.i, j] > 0) &
+        (t < self.p[j]))[0]
+      costs = np.concatenate([self.repair_cost[repair, j], t[arcs]])
+      for k in np.argsort(costs, kind='stable').tolist():
+        if k < len(repair):
+          i = repair[k]
+          units = min(shortfall[i, j], self.repair_cap[i, j])
+          self.w[i, j] += units
+        else:
+          arc = arcs[k - len(repair)]
+          i, source = self.arcs.l[arc], self.arcs.i[arc]
+          units = min(shortfall[i, j], surplus[source, j])
+          surplus[source, j] -= units
+          self.v[arc] += units
+        shortfall[i, j] -= units
+    self.z = shortfall
+
+  def print_solution(self):
+    report.print_solution(self.solution)
+
+  def to_html(self):
+    return report.to_html(self.solution)
+
+  def start(self, model):
+    # Column values for MatrixModel (see MatrixModel.run)
+    values = np.zeros(model.num_col)
+    values[:model.y_start] = self.x
+    values[model.y_start:model.z_start] = self.y
+    values[model.z_start:model.w_start] = self.z.ravel()
+    values[model.w_start:model.v_start] = self.w[model.w_i, model.w_j]
+    values[model.v_start:] = self.v
+    return values
@@ -0,0 +1,270 @@
+import highspy
+import numpy as np
+import scipy.sparse as sp
+
+from . import report
+from .arcs import TransferArcs
+from .export import export_model
+from .heuristic import Greedy
+from .presolve import Presolve
+from .solution import Solution
+from .telemetry import Telemetry
+
+class MatrixModel:
+  def __init__(self, data, arcs=None, tee=True, solve=True, telemetry=None, presolve=True, warm_start=True,
+      time_limit=None, gap=None, on_incumbent=None):
+    # Same formulation as Model, assembled directly as a sparse matrix and passed to HiGHS in one call.
+    # time_limit (seconds) and gap (relative) stop the solver early with the best plan found;
+    # on_incumbent(solution, bound) is called with each improved plan and the dual bound (see snapshot.py)
+    self.data = data
+    self.arcs = arcs if arcs is not None else TransferArcs(data)
+    self.telemetry = telemetry if telemetry is not None else Telemetry()
+    self.warm_start = warm_start
+    self.time_limit = time_limit
+    self.gap = gap
+    self.on_incumbent = on_incumbent
+    self.values = None # columns of the last plan found, the MIP start of update
+    self.presolve = None
+    if presolve:
+      with self.telemetry.phase('presolve'):
+        self.presolve = Presolve(data, self.arcs)
+      self.arcs = self.presolve.arcs
+    with self.telemetry.phase('build'):
+      self.build()
+    if solve:
+      self.solve(tee)
+
+  def build(self):
+    n_f = len(self.data.F)
+    n_r = len(self.data.E + self.data.I + self.data.S + self.data.C)
+    n_ei = len(self.data.E + self.data.I)
+    self.n_f, self.n_r, self.n_ei = n_f, n_r, n_ei
+    self.arc_j, self.arc_i, self.arc_l = self.arcs.j, self.arcs.i, self.arcs.l
+    n_v = len(self.arc_j)
+    repairable = (self.presolve.repairable if self.presolve is not None else
+      np.ones((n_f, n_ei), dtype=bool))
+    self.w_i, self.w_j = np.nonzero(repairable) # w only where something needs repair
+    n_w = len(self.w_i)
+
+    # Column layout: x (F) | y (F) | z (F x R) | w (repairable pairs) | v (arcs)
+    self.y_start = n_f
+    self.z_start = 2*n_f
+    self.w_start = self.z_start + n_f*n_r
+    self.v_start = self.w_start + n_w
+    self.num_col = self.v_start + n_v
+    facilities = np.arange(n_f)
+    z_cols = self.z_start + np.arange(n_f*n_r).reshape(n_f, n_r)
+    self.w_cols = np.full((n_f, n_ei), -1)
+    self.w_cols[self.w_i, self.w_j] = w_cols = self.w_start + np.arange(n_w)
+    v_cols = self.v_start + np.arange(n_v)
+
+    a = np.asarray(self.data.a, dtype=np.float64)
+    m = np.asarray(self.data.m, dtype=np.float64)
+    n = np.asarray(self.data.n, dtype=np.float64)
+    u = np.asarray(self.data.u, dtype=np.float64)
+    t = self.data.t
+
+    # Objective coefficients, matching Model.objective term by term
+    self.cost = np.concatenate([np.zeros(n_f), np.asarray(self.data.c, dtype=np.float64),
+      np.tile(np.asarray(self.data.p, dtype=np.float64), n_f), np.asarray(self.data.r, dtype=np.float64)[self.w_j],
+      t[self.arc_j, self.arc_i, self.arc_l]])
+
+    # Column bounds absorb repair_constraint, transfer_constraint, x <= u and y_fix_constraint
+    self.col_lower = np.zeros(self.num_col)
+    self.col_lower[self.y_start + np.array(self.data.K, dtype=np.int64)] = 1
+    self.col_upper = np.full(self.num_col, highspy.kHighsInf)
+    self.col_upper[:n_f] = u
+    self.col_upper[self.y_start:self.z_start] = 1
+    self.col_upper[self.w_start:self.v_start] = m[self.w_i, self.w_j]
+    equipment_arcs = self.arc_j < len(self.data.E)
+    self.col_upper[v_cols[equipment_arcs]] = a[self.arc_i[equipment_arcs], self.arc_j[equipment_arcs]]
+
+    # Row layout: demand (1) | coverage (F x R) | bed limits and y dependency (3 x F)
+    coverage_rows = 1 + np.arange(n_f*n_r).reshape(n_f, n_r)
+    bed_start = 1 + n_f*n_r
+    self.num_row = bed_start + 3*n_f
+    self.coverage_rows = coverage_rows
+    self.row_lower = np.concatenate([[self.data.d], -a.ravel(), np.full(3*n_f, -highspy.kHighsInf)])
+    self.row_upper = np.concatenate([[highspy.kHighsInf], np.full(n_f*n_r, highspy.kHighsInf),
+      np.zeros(3*n_f)])
+
+    rows = [np.zeros(n_f, dtype=np.int64), # demand: x
+      coverage_rows.ravel(), # coverage: z
+      coverage_rows[self.w_i, self.w_j], # coverage: w (equipments and infrastructure)
+      coverage_rows.ravel(), # coverage: -n*x
+      coverage_rows[self.arc_l, self.arc_j], # coverage: incoming transfers
+      coverage_rows[self.arc_i, self.arc_j], # coverage: outgoing transfers
+      bed_start + facilities, bed_start + facilities, # l*y - x <= 0
+      bed_start + n_f + facilities, bed_start + n_f + facilities, # x/u - y <= 0
+      bed_start + 2*n_f + facilities, bed_start + 2*n_f + facilities] # y - x <= 0
+    cols = [facilities, z_cols.ravel(), w_cols, np.repeat(facilities, n_r), v_cols, v_cols,
+      self.y_start + facilities, facilities, facilities, self.y_start + facilities,
+      self.y_start + facilities, facilities]
+    vals = [np.ones(n_f), np.ones(n_f*n_r), np.ones(n_w), -np.tile(n, n_f), np.ones(n_v),
+      -np.ones(n_v), np.asarray(self.data.l, dtype=np.float64), -np.ones(n_f), 1/u, -np.ones(n_f),
+      np.ones(n_f), -np.ones(n_f)]
+    rows, cols, vals = np.concatenate(rows), np.concatenate(cols), np.concatenate(vals)
+    nonzero = vals != 0
+    self.matrix = sp.csr_matrix((vals[nonzero], (rows[nonzero], cols[nonzero])),
+      shape=(self.num_row, self.num_col))
+    self.matrix.sum_duplicates()
+    self.integrality = np.full(self.num_col, int(highspy.HighsVarType.kInteger), dtype=np.int32)
+
+  def solve(self, tee=True):
+    with self.telemetry.phase('load'):
+      self.highs = self.load(tee)
+    if self.on_incumbent is not None:
+      self.highs.cbMipImprovingSolution.subscribe(self.improving)
+    start = None
+    if self.warm_start:
+      # The greedy plan (see heuristic.py) as the first incumbent
+      with self.telemetry.phase('heuristic'):
+        self.greedy = Greedy(self.data, self.arcs)
+      if self.greedy.feasible:
+        start = self.greedy.start(self)
+    self.run(tee, start=start)
+
+  def load(self, tee=True, relax=False):
+    # A new HiGHS instance holding the model (its LP relaxation with relax)
+    highs = highspy.Highs()
+    highs.setOptionValue('output_flag', tee)
+    highs.passModel(self.num_col, self.num_row, self.matrix.nnz, int(highspy.MatrixFormat.kRowwise),
+      int(highspy.ObjSense.kMinimize), 0.0, self.cost, self.col_lower, self.col_upper, self.row_lower,
+      self.row_upper, self.matrix.indptr.astype(np.int32), self.matrix.indices.astype(np.int32),
+      self.matrix.data, np.zeros(self.num_col, dtype=np.int32) if relax else self.integrality)
+    return highs
+
+  def write_model(self, filename):
+    # LP or MPS, from the extension; a separate HiGHS instance, so a background export does not
+    # touch the one being solved
+    self.load(tee=False).writeModel(filename)
+
+  def export(self, filename=None, background=None, **options):
+    # See export.export_model
+    return export_model(self, filename, background, **options)
+
+  def run(self, tee=True, start=None):
+    # start: column values handed to HiGHS as a MIP start
+    if start is not None:
+      solution = highspy.HighsSolution()
+      solution.col_value = start
+      solution.value_valid = True
+      self.highs.setSolution(solution)
+    if self.time_limit is not None:
+      self.highs.setOptionValue('time_limit', float(self.time_limit))
+    if self.gap is not None:
+      self.highs.setOptionValue('mip_rel_gap', float(self.gap))
+    self.telemetry.watch(self.highs, tee)
+    with self.telemetry.phase('solve'):
+      self.highs.run()
+    self.telemetry.record_solver(self.highs)
+    with self.telemetry.phase('extract'):
+      self.status = self.highs.getModelStatus()
+      self.lower_bound = self.highs.getInfo().mip_dual_bound
+      self.solution = self.values = None
+      # A time limit can stop the solver before it finds any plan
+      if self.highs.getInfo().primal_solution_status == int(highspy.SolutionStatus.kSolutionStatusFeasible):
+        self.set_values(self.highs.getSolution().col_value, self.highs.getInfo().objective_function_value)
+
+  def set_values(self, values, objective):
+    # Column values of a solution, from this model's HiGHS instance or another one with the same layout
+    self.objective_value = objective
+    self.values = values = np.rint(np.array(values))
+    self.x, self.y, self.z, self.w, self.v = self.split(values)
+    self.solution = Solution(self.data, self.objective_value, self.x, self.y, self.z, self.w, self.v,
+      self.arc_j, self.arc_i, self.arc_l)
+
+  def split(self, values):
+    # x, y, z, w and v (units moved along each (arc_j, arc_i, arc_l)) from the column values
+    z = values[self.z_start:self.w_start].reshape(self.n_f, self.n_r)
+    w = np.zeros((self.n_f, self.n_ei))
+    w[self.w_i, self.w_j] = values[self.w_start:self.v_start]
+    return values[:self.y_start], values[self.y_start:self.z_start], z, w, values[self.v_start:]
+
+  def improving(self, event):
+    # HiGHS callback on each new incumbent
+    x, y, z, w, v = self.split(np.rint(np.array(event.data_out.mip_solution)))
+    self.on_incumbent(Solution(self.data, event.data_out.objective_function_value, x, y, z, w, v, self.arc_j,
+      self.arc_i, self.arc_l), event.data_out.mip_dual_bound)
+
+  def print_solution(self):
+    report.print_solution(self.solution)
+
+  def to_html(self):
+    return report.to_html(self.solution)
+
+  def update(self, a=None, m=None, d=None, tee=False):
+    # Apply a delta to the data, change only the affected bounds and costs of the persistent HiGHS
+    # instance and re-solve from the previous incumbent, or cold when there is none. a and m map (facility, requirement) to the
+    # new value; d is the new demand
+    if self.presolve is not None and not self.presolve.valid(a, m):
+      # The delta brings back variables the presolve had dropped, so it is redone and the model rebuilt
+      for (i, j), value in (a or {}).items():
+        self.data.a[i][j] = value
+      for (i, j), value in (m or {}).items():
+        self.data.m[i][j] = value
+      if d is not None:
+        self.data.d = d
+      with self.telemetry.phase('presolve'):
+        self.presolve = Presolve(self.data, self.presolve.base_arcs)
+      self.arcs = self.presolve.arcs
+      with self.telemetry.phase('build'):
+        self.build()
+      self.solve(tee)
+      return
+    for (i, j), value in (a or {}).items():
+      self.data.a[i][j] = value
+      row = self.coverage_rows[i, j]
+      self.row_lower[row] = -value
+      self.highs.changeRowBounds(int(row), -value, highspy.kHighsInf)
+      if j in self.data.E:
+        cols = (self.v_start + np.nonzero((self.arc_i == i) & (self.arc_j == j))[0]).astype(np.int32)
+        self.col_upper[cols] = value
+        self.highs.changeColsBounds(len(cols), cols, self.col_lower[cols], self.col_upper[cols])
+    for (i, j), value in (m or {}).items():
+      self.data.m[i][j] = value
+      col = int(self.w_cols[i, j])
+      if col < 0: # dropped by the presolve and still zero
+        continue
+      self.col_upper[col] = value
+      self.highs.changeColBounds(col, self.col_lower[col], value)
+    if d is not None:
+      self.data.d = d
+      self.row_lower[0] = d
+      self.highs.changeRowBounds(0, d, highspy.kHighsInf)
+    self.run(tee, start=self.values)
+
+  def price_out(self, max_rounds=10, tee=False):
+    # Heuristic check for pruned arcs: with the openings y fixed, solve the LP relaxation and add every
+    # pruned arc with negative reduced cost, then re-solve. The duals ignore integrality and the other
+    # openings, so a pruned arc can still lower the cost when none is added: the plan is not certified
+    # optimal for the full model. Returns the number of arcs added; without a plan there are no openings
+    # to fix and nothing is checked
+    added = 0
+    a = self.data.a
+    t = self.data.t
+    for _ in range(max_rounds):
+      if self.solution is None:
+        break
+      lp = highspy.Highs()
+      lp.setOptionValue('output_flag', False)
+      col_lower, col_upper = self.col_lower.copy(), self.col_upper.copy()
+      col_lower[self.y_start:self.z_start] = col_upper[self.y_start:self.z_start] = self.y
+      lp.passModel(self.num_col, self.num_row, self.matrix.nnz, int(highspy.MatrixFormat.kRowwise),
+        int(highspy.ObjSense.kMinimize), 0.0, self.cost, col_lower, col_upper, self.row_lower,
+        self.row_upper, self.matrix.indptr.astype(np.int32), self.matrix.indices.astype(np.int32),
+        self.matrix.data, np.zeros(self.num_col, dtype=np.int32))
+      lp.run()
+      dual = np.array(lp.getSolution().row_dual)
+      j, i, l = self.arcs.pruned()
+      reduced_cost = (t[j, i, l] - dual[self.coverage_rows[l, j]] + dual[self.coverage_rows[i, j]])
+      usable = (j >= len(self.data.E)) | (a[i, j] > 0) # equipment arcs are capped by a
+      entering = (reduced_cost < -1e-9) & usable
+      if not entering.any():
+        break
+      self.arcs.add(j[entering], i[entering], l[entering])
+      added += int(entering.sum())
+      with self.telemetry.phase('build'):
+        self.build()
+      self.solve(tee)
+    return added
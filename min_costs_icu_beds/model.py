@@ -0,0 +1,235 @@
+import numpy as np
+import pyomo.environ as pyo
+
+from . import report
+from .arcs import TransferArcs
+from .export import export_model
+from .heuristic import Greedy
+from .presolve import Presolve
+from .solution import Solution
+from .telemetry import Telemetry
+
+class Model:
+  def __init__(self, data, arcs=None, tee=True, solve=True, telemetry=None, presolve=True, warm_start=True,
+      time_limit=None, gap=None, on_incumbent=None):
+    # time_limit (seconds) and gap (relative) stop the solver early with the best plan found;
+    # on_incumbent(solution, bound) is called with each improved plan and the dual bound (see snapshot.py)
+    # Data
+    self.data = data
+    self.arcs = arcs if arcs is not None else TransferArcs(data)
+    self.telemetry = telemetry if telemetry is not None else Telemetry()
+    self.warm_start = warm_start
+    self.time_limit = time_limit
+    self.gap = gap
+    self.on_incumbent = on_incumbent
+    self.presolve = None
+    if presolve:
+      with self.telemetry.phase('presolve'):
+        self.presolve = Presolve(data, self.arcs)
+      self.arcs = self.presolve.arcs
+    with self.telemetry.phase('build'):
+      self.build()
+    if solve:
+      self.solve(tee)
+
+  def build(self):
+    self.model = pyo.ConcreteModel()
+    self.model.F = self.data.F
+    self.model.E = self.data.E
+    self.model.I = self.data.I
+    self.model.S = self.data.S
+    self.model.C = self.data.C
+    self.model.K = self.data.K
+    R = self.model.E + self.model.I + self.model.S + self.model.C
+    # Mutable parameters for the data that update() can change without rebuilding the model
+    self.model.d = pyo.Param(initialize=int(self.data.d), mutable=True)
+    self.model.a = pyo.Param(self.model.F, R, initialize={(i, j): int(self.data.a[i][j]) for i in self.model.F
+      for j in R}, mutable=True)
+    self.model.m = pyo.Param(self.model.F, (self.model.E + self.model.I),
+      initialize={(i, j): int(self.data.m[i][j]) for i in self.model.F
+      for j in (self.model.E + self.model.I)}, mutable=True)
+
+    # Variables
+    self.model.x = pyo.Var(self.model.F, within=pyo.NonNegativeIntegers) # x: number of ICU beds in each facility
+    self.model.y = pyo.Var(self.model.F, within=pyo.Binary) # y: whether each facility is built or not
+    self.model.z = pyo.Var(self.model.F, R,
+      within=pyo.NonNegativeIntegers) # z: number of each requirement acquired by each facility
+    repairable = (self.presolve.repairable if self.presolve is not None else
+      np.ones((len(self.data.F), len(self.data.E + self.data.I)), dtype=bool))
+    self.model.w = pyo.Var(list(zip(*(index.tolist() for index in np.nonzero(repairable)))),
+      within=pyo.NonNegativeIntegers) # w: number of each requirement repaired in each facility, where something needs repair
+    self.model.v = pyo.Var(self.arcs.index(),
+      within=pyo.NonNegativeIntegers) # v: number of each requirement transferred from each facility to each facility
+    repaired = {(i, j): self.model.w[i, j] for i, j in self.model.w}
+    incoming = {}
+    outgoing = {}
+    for j, i, l in self.model.v:
+      incoming.setdefault((l, j), []).append(i)
+      outgoing.setdefault((i, j), []).append(l)
+    
+    # Objective function
+    self.model.objective = pyo.Objective(expr=sum(self.data.c[i]*self.model.y[i] +
+        sum(self.data.p[j]*self.model.z[i, j] for j in R) +
+        sum(self.data.r[j]*repaired[i, j] for j in (self.model.E + self.model.I) if (i, j) in repaired) +
+        sum(sum(self.data.t[j][i][l]*self.model.v[j, i, l] for l in outgoing.get((i, j), []))
+        for j in (self.model.E + self.model.S)) for i in self.model.F), sense=pyo.minimize)
+    
+    # Constraints
+    self.model.demand_constraint = pyo.Constraint(expr=sum(self.model.x[i] for i in self.model.F) >=
+      self.model.d)
+    self.model.equipment_constraint = pyo.ConstraintList()
+    for i in self.model.F:
+      for j in self.model.E:
+        self.model.equipment_constraint.add(self.model.a[i, j] + self.model.z[i, j] +
+          repaired.get((i, j), 0) + sum(self.model.v[j, l, i] for l in incoming.get((i, j), [])) -
+          sum(self.model.v[j, i, l] for l in outgoing.get((i, j), [])) >= self.data.n[j]*self.model.x[i])
+    self.model.infrastructure_constraint = pyo.ConstraintList()
+    for i in self.model.F:
+      for j in self.model.I:
+        self.model.infrastructure_constraint.add(self.model.a[i, j] + self.model.z[i, j] +
+          repaired.get((i, j), 0) >= self.data.n[j]*self.model.x[i])
+    self.model.staff_constraint = pyo.ConstraintList()
+    for i in self.model.F:
+      for j in self.model.S:
+        self.model.staff_constraint.add(self.model.a[i, j] + self.model.z[i, j] +
+          sum(self.model.v[j, l, i] for l in incoming.get((i, j), [])) -
+          sum(self.model.v[j, i, l] for l in outgoing.get((i, j), [])) >= self.data.n[j]*self.model.x[i])
+    self.model.consumable_constraint = pyo.ConstraintList()
+    for i in self.model.F:
+      for j in self.model.C:
+        self.model.consumable_constraint.add(self.model.a[i, j] + self.model.z[i, j] >=
+          self.data.n[j]*self.model.x[i])
+    self.model.repair_constraint = pyo.ConstraintList()
+    for i, j in self.model.w:
+      self.model.repair_constraint.add(self.model.w[i, j] <= self.model.m[i, j])
+    self.model.transfer_constraint = pyo.ConstraintList()
+    for j, i, l in self.model.v:
+      if j in self.model.E:
+        self.model.transfer_constraint.add(self.model.v[j, i, l] <= self.model.a[i, j])
+    self.model.bed_limit_constraint = pyo.ConstraintList()
+    for i in self.model.F:
+      self.model.bed_limit_constraint.add(self.data.l[i]*self.model.y[i] <= self.model.x[i])
+      self.model.bed_limit_constraint.add(self.model.x[i] <= self.data.u[i])
+    self.model.y_fix_constraint = pyo.ConstraintList()
+    for i in self.model.K:
+      self.model.y_fix_constraint.add(self.model.y[i] == 1)
+    self.model.y_dependent_constraint = pyo.ConstraintList()
+    for i in self.model.F:
+      self.model.y_dependent_constraint.add(self.model.x[i] / self.data.u[i] <= self.model.y[i])
+      self.model.y_dependent_constraint.add(self.model.y[i] <= self.model.x[i])
+    
+
+  def write_model(self, filename):
+    # LP or MPS, from the extension
+    self.model.write(filename, io_options={'symbolic_solver_labels': True})
+
+  def export(self, filename=None, background=None, **options):
+    # See export.export_model
+    return export_model(self, filename, background, **options)
+
+  def solve(self, tee=True):
+    # appsi_highs is persistent: later solves only push the changes made since the previous one
+    self.opt = pyo.SolverFactory('appsi_highs')
+    if self.gap is not None:
+      self.opt.config.mip_gap = self.gap
+    with self.telemetry.phase('load'):
+      self.opt.set_instance(self.model)
+    if self.on_incumbent is not None:
+      self.watch_incumbents()
+    if self.warm_start:
+      # The greedy plan (see heuristic.py) as the first incumbent
+      with self.telemetry.phase('heuristic'):
+        self.greedy = Greedy(self.data, self.arcs)
+      if self.greedy.feasible:
+        self.set_start(self.greedy)
+        self.opt.config.warmstart = True
+    self.run(tee)
+
+  def set_start(self, plan):
+    # Variable values from a plan with x, y, z, w and v arrays over this model's arcs
+    for i in self.model.F:
+      self.model.x[i].set_value(plan.x[i])
+      self.model.y[i].set_value(plan.y[i])
+    for i, j in self.model.z:
+      self.model.z[i, j].set_value(plan.z[i, j])
+    for i, j in self.model.w:
+      self.model.w[i, j].set_value(plan.w[i, j])
+    for k, arc in enumerate(self.arcs.index()):
+      self.model.v[arc].set_value(plan.v[k])
+
+  def watch_incumbents(self):
+    # HiGHS columns of each variable in appsi's mapping, so every new incumbent becomes a Solution
+    # without going through pyomo
+    column = self.opt._pyomo_var_to_solver_var_map
+    R, EI = self.model.E + self.model.I + self.model.S + self.model.C, self.model.E + self.model.I
+    def columns(variables, index):
+      return np.array([column[id(variables[key])] if key in variables else -1 for key in index], dtype=np.int64)
+    x_cols, y_cols = columns(self.model.x, self.model.F), columns(self.model.y, self.model.F)
+    z_cols = columns(self.model.z, [(i, j) for i in self.model.F for j in R]).reshape(-1, len(R))
+    w_cols = columns(self.model.w, [(i, j) for i in self.model.F for j in EI]).reshape(-1, len(EI))
+    v_cols = columns(self.model.v, self.arcs.index())
+    def improving(event):
+      values = np.append(np.rint(np.array(event.data_out.mip_solution)), 0) # column -1 reads 0
+      self.on_incumbent(Solution(self.data, event.data_out.objective_function_value, values[x_cols],
+        values[y_cols], values[z_cols], values[w_cols], values[v_cols], self.arcs.j, self.arcs.i, self.arcs.l),
+        event.data_out.mip_dual_bound)
+    self.opt._solver_model.cbMipImprovingSolution.subscribe(improving)
+
+  def run(self, tee=True):
+    # appsi_highs keeps its HiGHS instance in _solver_model; watching it gives the same solver
+    # statistics as MatrixModel
+    self.telemetry.watch(self.opt._solver_model, tee)
+    with self.telemetry.phase('solve'):
+      # The legacy interface resets the time limit on every solve, so it is passed here
+      self.results = self.opt.solve(self.model, tee=tee, load_solutions=False, timelimit=self.time_limit,
+        warmstart=self.opt.config.warmstart)
+    self.telemetry.record_solver(self.opt._solver_model)
+    with self.telemetry.phase('extract'):
+      self.lower_bound = self.results.problem.lower_bound
+      self.solution = None
+      if self.results.problem.upper_bound is not None:
+        self.opt.load_vars()
+        self.extract_solution()
+
+  def update(self, a=None, m=None, d=None, tee=False):
+    # Apply a delta to the data and re-solve, warm-started from the previous incumbent. a and m map
+    # (facility, requirement) to the new value; d is the new demand
+    for (i, j), value in (a or {}).items():
+      self.data.a[i][j] = value
+      self.model.a[i, j] = value
+    for (i, j), value in (m or {}).items():
+      self.data.m[i][j] = value
+      self.model.m[i, j] = value
+    if d is not None:
+      self.data.d = d
+      self.model.d = d
+    if self.presolve is not None and not self.presolve.valid(a, m):
+      # The delta brings back variables the presolve had dropped, so it is redone and the model rebuilt
+      with self.telemetry.phase('presolve'):
+        self.presolve = Presolve(self.data, self.presolve.base_arcs)
+      self.arcs = self.presolve.arcs
+      with self.telemetry.phase('build'):
+        self.build()
+      self.solve(tee)
+      return
+    self.opt.config.warmstart = True
+    self.run(tee)
+    
+  def extract_solution(self):
+    # One pass over the variable values; the reports read from self.solution
+    x, y = self.model.x.extract_values(), self.model.y.extract_values()
+    z, w, v = self.model.z.extract_values(), self.model.w.extract_values(), self.model.v.extract_values()
+    R, EI = self.model.E + self.model.I + self.model.S + self.model.C, self.model.E + self.model.I
+    self.solution = Solution(self.data, pyo.value(self.model.objective),
+      np.array([x[i] or 0 for i in self.model.F], dtype=np.float64),
+      np.array([y[i] or 0 for i in self.model.F], dtype=np.float64),
+      np.array([z[i, j] or 0 for i in self.model.F for j in R], dtype=np.float64).reshape(-1, len(R)),
+      np.array([w.get((i, j)) or 0 for i in self.model.F for j in EI], dtype=np.float64).reshape(-1, len(EI)),
+      np.array([v[arc] or 0 for arc in self.arcs.index()], dtype=np.float64),
+      self.arcs.j, self.arcs.i, self.arcs.l)
+
+  def print_solution(self):
+    report.print_solution(self.solution)
+
+  def to_html(self):
+    return report.to_html(self.solution)
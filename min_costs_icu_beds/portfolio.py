@@ -0,0 +1,247 @@
+import math
+import multiprocessing
+import os
+import queue
+import time
+
+import numpy as np
+
+from . import report
+from .matrix_model import MatrixModel
+from .telemetry import Telemetry
+
+# Several HiGHS configurations raced on the same MatrixModel in worker processes. The workers share the
+# best plan found so far: each new incumbent is published to shared memory and offered to the others
+# through the user-solution callback, and the first worker to prove optimality (its own search, or its
+# dual bound meeting the shared incumbent) stops the rest through the interrupt callback. The race also
+# ends at the time limit. Every worker starts from the greedy plan.
+
+# HiGHS options of each configuration, in the order they are handed to the workers; None is the LP
+# relaxation rounded to a set of open hospitals, whose restricted MIP gives an early incumbent
+CONFIGURATIONS = {
+  'default': {},
+  'lp-rounding': None,
+  'heuristics': {'mip_heuristic_effort': 0.3}, # emphasis on feasible plans
+  'seed-1': {'random_seed': 1},
+  'bound': {'mip_heuristic_effort': 0.0, 'mip_pscost_minreliable': 16}, # emphasis on the bound
+  'cuts': {'mip_lp_age_limit': 30, 'mip_pool_soft_limit': 50000}, # keep cuts for longer
+  'no-presolve': {'presolve': 'off'},
+  'seed-2': {'random_seed': 2},
+  'no-restart': {'mip_allow_restart': False, 'mip_detect_symmetry': False},
+}
+
+RELATIVE_GAP = 1e-4 # HiGHS's default mip_rel_gap
+
+class _Incumbent:
+  # The best plan over all workers, in shared memory
+  def __init__(self, context, num_col):
+    self.objective = context.Value('d', math.inf)
+    self.values = context.Array('d', num_col, lock=False)
+    self.owner = context.Value('i', -1)
+    self.proven = context.Value('b', 0)
+    self.stop = context.Event()
+
+  def publish(self, worker, objective, values):
+    with self.objective.get_lock():
+      if objective < self.objective.value - 1e-9:
+        self.values[:] = values
+        self.objective.value = objective
+        self.owner.value = worker
+
+  def prove(self):
+    self.proven.value = 1
+    self.stop.set()
+
+  def closes(self, bound):
+    # Whether a dual bound proves the shared incumbent optimal
+    best = self.objective.value
+    return best < math.inf and best - bound <= RELATIVE_GAP*max(1.0, abs(best))
+
+def _watch(highs, worker, incumbent, own, proves, deadline):
+  # proves: whether the dual bound of this worker holds for the whole model. HiGHS can run past its
+  # time limit, so the deadline is also checked at each interrupt point
+  def improving(event):
+    own[0] = min(own[0], event.data_out.objective_function_value)
+    incumbent.publish(worker, event.data_out.objective_function_value, event.data_out.mip_solution)
+  def interrupt(event):
+    if proves and incumbent.closes(event.data_out.mip_dual_bound):
+      incumbent.prove()
+    if incumbent.stop.is_set() or (deadline is not None and time.time() >= deadline):
+      event.interrupt()
+  def user_solution(event):
+    if incumbent.objective.value < own[0] - 1e-9:
+      with incumbent.objective.get_lock():
+        own[0] = incumbent.objective.value
+        event.data_in.setSolution(np.frombuffer(incumbent.values, dtype=np.float64).copy())
+  highs.cbMipImprovingSolution.subscribe(improving)
+  highs.cbMipInterrupt.subscribe(interrupt)
+  highs.cbMipUserSolution.subscribe(user_solution)
+
+def _start(model, highs, worker, incumbent, own, warm_start):
+  if not warm_start:
+    return
+  from .heuristic import Greedy
+  greedy = Greedy(model.data, model.arcs)
+  if greedy.feasible:
+    values = greedy.start(model)
+    solution = highs.getSolution()
+    solution.col_value = values
+    solution.value_valid = True
+    highs.setSolution(solution)
+    own[0] = greedy.objective
+    incumbent.publish(worker, greedy.objective, values)
+
+def _round(model, relaxation):
+  # Hospitals open in the LP optimum (y >= 1/2, plus the built ones), then the most open of the rest
+  # until their capacity covers the demand
+  y = relaxation[model.y_start:model.z_start]
+  rounded = (y >= 0.5) | (model.col_lower[model.y_start:model.z_start] >= 1)
+  u = np.asarray(model.data.u)
+  for i in np.argsort(-y, kind='stable'):
+    if u[rounded].sum() >= model.data.d:
+      break
+    rounded[i] = True
+  return rounded.astype(np.float64)
+
+def _worker(worker, name, options, data, arcs, presolve, incumbent, results, deadline, warm_start):
+  # deadline: wall-clock time (time.time()) at which the race ends, or None
+  import highspy
+  started = time.perf_counter()
+  own = [math.inf]
+  try:
+    model = MatrixModel(data, arcs, solve=False, presolve=presolve, warm_start=False)
+    if options is None:
+      lp = model.load(tee=False, relax=True)
+      lp.run()
+      y = _round(model, np.array(lp.getSolution().col_value))
+      highs = model.load(tee=False)
+      columns = np.arange(model.y_start, model.z_start, dtype=np.int32)
+      highs.changeColsBounds(len(columns), columns, y, y)
+    else:
+      highs = model.load(tee=False)
+      for key, value in options.items():
+        if highs.setOptionValue(key, value) != highspy.HighsStatus.kOk:
+          raise ValueError('invalid HiGHS option {}={!r}'.format(key, value))
+    if deadline is not None:
+      highs.setOptionValue('time_limit', max(deadline - time.time(), 0.0))
+    _start(model, highs, worker, incumbent, own, warm_start)
+    _watch(highs, worker, incumbent, own, options is not None, deadline)
+    highs.run()
+    status = highs.getModelStatus()
+    info = highs.getInfo()
+    if options is not None and status == highspy.HighsModelStatus.kOptimal:
+      incumbent.prove()
+    status = highs.modelStatusToString(status)
+    if options is None and status == 'Optimal':
+      status = 'Optimal (hospitals fixed)'
+    result = {'name': name, 'status': status, 'objective': info.objective_function_value,
+      'bound': info.mip_dual_bound, 'nodes': info.mip_node_count}
+  except Exception as error:
+    result = {'name': name, 'status': 'Error: {}'.format(error), 'objective': None, 'bound': None,
+      'nodes': None}
+  result['seconds'] = time.perf_counter() - started
+  results.put(result)
+
+class Portfolio:
+  def __init__(self, data, arcs=None, configurations=None, workers=None, time_limit=None, solve=True,
+      telemetry=None, presolve=True, warm_start=True, grace=5.0):
+    # configurations: names from CONFIGURATIONS or a dict of name -> HiGHS options (None for the LP
+    # rounding); the first `workers` of them race, one process each
+    self.data = data
+    self.telemetry = telemetry if telemetry is not None else Telemetry()
+    self.model = MatrixModel(data, arcs, solve=False, telemetry=self.telemetry, presolve=presolve,
+      warm_start=False)
+    self.presolve = self.model.presolve
+    if configurations is None:
+      configurations = CONFIGURATIONS
+    if not isinstance(configurations, dict):
+      configurations = {name: CONFIGURATIONS[name] for name in configurations}
+    workers = min(workers or os.cpu_count() or 1, len(configurations))
+    self.configurations = {name: configurations[name] for name in list(configurations)[:workers]}
+    self.names = list(self.configurations)
+    self.time_limit = time_limit
+    self.warm_start = warm_start
+    self.grace = grace
+    if solve:
+      self.solve()
+
+  def export(self, filename=None, background=None, **options):
+    # The model the workers solve, see export.export_model
+    return self.model.export(filename, background, **options)
+
+  def solve(self):
+    context = multiprocessing.get_context()
+    incumbent = _Incumbent(context, self.model.num_col)
+    results = context.Queue()
+    # The workers redo the presolve from the same arcs, which gives them this model's column layout
+    presolve = self.presolve is not None
+    arcs = self.presolve.base_arcs if presolve else self.model.arcs
+    deadline = None if self.time_limit is None else time.time() + self.time_limit
+    processes = [context.Process(target=_worker, args=(k, name, options, self.data, arcs, presolve, incumbent,
+      results, deadline, self.warm_start), daemon=True) for k, (name, options) in
+      enumerate(self.configurations.items())]
+    with self.telemetry.phase('solve'):
+      self.race(incumbent, results, processes, self.time_limit, self.grace)
+    self.telemetry.set('workers', len(processes))
+
+    self.objective = incumbent.objective.value
+    self.proven = bool(incumbent.proven.value)
+    self.winner = self.names[incumbent.owner.value] if incumbent.owner.value >= 0 else None
+    with self.telemetry.phase('extract'):
+      if self.objective < math.inf:
+        self.status = 'Optimal' if self.proven else 'Feasible'
+        self.model.set_values(np.frombuffer(incumbent.values, dtype=np.float64), self.objective)
+        self.solution = self.model.solution
+        self.telemetry.set('objective', self.objective)
+      else:
+        self.status = 'No solution'
+        self.solution = None
+
+  def race(self, incumbent, results, processes, time_limit, grace):
+    started = time.perf_counter()
+    for process in processes:
+      process.start()
+
+    # Wait for every worker, until the time limit (HiGHS stops on its own there) or a proof of
+    # optimality, after which the others get `grace` seconds to notice the interrupt and report
+    self.results = []
+    deadline = None if time_limit is None else started + time_limit + grace
+    while len(self.results) < len(processes):
+      if incumbent.stop.is_set():
+        proof = time.perf_counter() + grace
+        deadline = proof if deadline is None else min(deadline, proof)
+      timeout = None if deadline is None else deadline - time.perf_counter()
+      if timeout is not None and timeout <= 0:
+        break
+      try:
+        self.results.append(results.get(timeout=1.0 if timeout is None else min(timeout, 1.0)))
+      except queue.Empty:
+        pass
+    incumbent.stop.set()
+    for process in processes:
+      process.join(timeout=grace)
+      if process.is_alive():
+        process.terminate()
+    reported = {result['name'] for result in self.results}
+    self.results += [{'name': name, 'status': 'Cancelled', 'objective': None, 'bound': None, 'nodes': None,
+      'seconds': None} for name in self.names if name not in reported]
+    self.results.sort(key=lambda result: self.names.index(result['name']))
+    self.seconds = time.perf_counter() - started
+
+  def print_results(self):
+    print('{:>14} {:>28} {:>16} {:>16} {:>8} {:>8}'.format('Configuration', 'Status', 'Objective', 'Bound',
+      'Nodes', 'Seconds'))
+    for result in self.results:
+      print('{:>14} {:>28} {:>16} {:>16} {:>8} {:>8}'.format(result['name'], result['status'],
+        '-' if result['objective'] is None else '{:,.2f}'.format(result['objective']),
+        '-' if result['bound'] is None else '{:,.2f}'.format(result['bound']),
+        '-' if result['nodes'] is None else result['nodes'],
+        '-' if result['seconds'] is None else '{:.2f}'.format(result['seconds'])))
+    print('Best: {} ({}, found by {}) in {:.2f} s'.format(
+      '-' if self.solution is None else '{:,.2f}'.format(self.objective), self.status, self.winner, self.seconds))
+
+  def print_solution(self):
+    report.print_solution(self.solution)
+
+  def to_html(self):
+    return report.to_html(self.solution)
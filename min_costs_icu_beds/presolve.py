@@ -0,0 +1,68 @@
+import copy
+
+import numpy as np
+
+from .arcs import TransferArcs
+
+# Variables the data fixes at zero, found before the model is built so they are never created:
+# - w[i, j] <= m[i, j]: no repair variable (nor its bound row) where nothing needs repair
+# - v[j, i, l] <= a[i, j] for equipments: no equipment transfers out of a facility without units
+# - staff transfers are not capped by a, but moving staff out of a facility that has none is never
+#   needed when the costs are nonnegative and the kept arcs satisfy the triangle inequality through
+#   that facility: staff acquired there could be acquired at the destination for the same price, and
+#   staff passing through it can take the direct arc for no more
+# The reduction depends on which a and m are zero, so an update that makes one of them positive
+# invalidates it (see valid())
+
+class Presolve:
+  def __init__(self, data, arcs=None, tolerance=1e-9):
+    self.base_arcs = arcs if arcs is not None else TransferArcs(data)
+    self.arcs = copy.deepcopy(self.base_arcs)
+    n_e, n_ei = len(data.E), len(data.E + data.I)
+    a = np.asarray(data.a)
+    m = np.asarray(data.m)
+    self.repairable = m[:, :n_ei] > 0
+    self.w_dropped = int(self.repairable.size - self.repairable.sum())
+
+    keep = self.arcs.keep # (position in transferable, i, l)
+    transferable = self.arcs.transferable
+    before = keep.sum(axis=(1, 2))
+    empty = a[:, transferable].T == 0 # (position in transferable, i): nothing to send from i
+    equipments = transferable < n_e
+    self.cut = np.zeros_like(empty) # facilities whose outgoing arcs were dropped
+    self.cut[equipments] = empty[equipments]
+    keep[self.cut] = False
+
+    for position in np.nonzero(~equipments)[0]:
+      t = np.asarray(data.t[transferable[position]], dtype=np.float64)
+      arcs = keep[position].copy() # the triangle check runs against the arcs before this step
+      if (t[arcs] < 0).any():
+        continue
+      for i in np.nonzero(empty[position])[0]:
+        # Every path k -> i -> l (k != l) needs a kept k -> l that costs no more
+        k, l = np.nonzero(arcs[:, i])[0], np.nonzero(arcs[i, :])[0]
+        shortcut = arcs[np.ix_(k, l)] & (t[np.ix_(k, l)] <= t[k, i][:, np.newaxis] + t[i, l][np.newaxis, :] + tolerance)
+        if (shortcut | (k[:, np.newaxis] == l[np.newaxis, :])).all():
+          keep[position, i, :] = False
+          self.cut[position, i] = True
+    self.arcs.update()
+
+    after = keep.sum(axis=(1, 2))
+    self.equipment_arcs_dropped = int((before - after)[equipments].sum())
+    self.staff_arcs_dropped = int((before - after)[~equipments].sum())
+
+  def valid(self, a=None, m=None):
+    # Whether a delta as taken by Model.update() keeps the reduction exact
+    position = {j: k for k, j in enumerate(self.arcs.transferable.tolist())}
+    for (i, j), value in (a or {}).items():
+      if value > 0 and j in position and self.cut[position[j], i]:
+        return False
+    for (i, j), value in (m or {}).items():
+      if value > 0 and not self.repairable[i, j]:
+        return False
+    return True
+
+  def report(self):
+    print('Presolve: dropped', self.w_dropped, 'repair variables,', self.equipment_arcs_dropped,
+      'equipment transfers and', self.staff_arcs_dropped, 'staff transfers (' + str(len(self.arcs.j)),
+      'transfer arcs left)')
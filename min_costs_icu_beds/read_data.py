@@ -0,0 +1,402 @@
+import glob
+import math
+import os.path
+import pickle
+import time
+
+import numpy as np
+
+SNAPSHOT_FORMAT = 2 # columnar tables and dense inventories
+
+# The Google client libraries are imported where they are used, so offline runs work without them.
+# Each entity tab is kept as a Table of columns and each per-hospital inventory as a dense hospital x
+# entity matrix, so model data can be taken as whole arrays instead of one scalar getter call per value
+class ReadData:
+  def __init__(self, service=None, cache_dir=".cache", ttl=24*60*60, offline=False, refresh=False):
+    # If modifying these scopes, delete the file token.json.
+    self.scopes = ["https://www.googleapis.com/auth/spreadsheets",
+      "https://www.googleapis.com/auth/drive.metadata.readonly"]
+
+    self.spreadsheet_id = "1P8e1KawU9v7YuTZHUYrmXV8m494r9APV_CxzxC6qhDA"
+    self.max_batch_ranges = 100 # ranges per values().batchGet request
+
+    # Parsed data is kept as on-disk snapshots keyed by spreadsheet id and revision. Offline, the
+    # newest snapshot is loaded without contacting Google; online, a snapshot younger than ttl
+    # seconds (None: no expiry) is reused unless refresh is set
+    self.cache_dir = cache_dir
+    self.ttl = ttl
+    self.revision = None
+    self.creds = None
+    self.service = service
+    if offline:
+      self.load_snapshot(self.latest_snapshot())
+      return
+
+    # The Sheets service is built once; a fake with the same interface can be passed for testing
+    if self.service is None:
+      from googleapiclient.discovery import build
+      self.authorize()
+      self.service = build("sheets", "v4", credentials=self.creds)
+    self.revision = self.get_revision()
+    if service is not None and self.revision is None:
+      # An injected service has no Drive revision, and a snapshot keyed "latest" would mix its data with
+      # the spreadsheet's, so it is read directly and never cached
+      self.fetch()
+      return
+    path = self.snapshot_path(self.revision)
+    if not refresh and self.snapshot_fresh(path):
+      self.load_snapshot(path)
+    else:
+      self.fetch()
+      self.save_snapshot(path)
+
+  def fetch(self):
+    # One request for the entity tabs, then one for every per-hospital tab
+    values = self.batch_get(["Hospital!A2:H", "Equipamento!A2:F", "Profissional!A2:E", "Insumo!A2:E"])
+    self.read_hospital(values[0])
+    self.read_equipment(values[1])
+    self.read_staff(values[2])
+    self.read_consumable(values[3])
+
+    # Inventories as dense hospital x entity matrices, zero where a hospital does not list an entity
+    n_h = len(self.hospitals)
+    self.equipment_quantity = np.zeros((n_h, len(self.equipments)), dtype=np.int64)
+    self.equipment_maintenance = np.zeros((n_h, len(self.equipments)), dtype=np.int64)
+    self.staff_quantity = np.zeros((n_h, len(self.staff)), dtype=np.int64)
+    self.consumable_quantity = np.zeros((n_h, len(self.consumables)), dtype=np.int64)
+    ranges = []
+    for name in self.hospitals["names"].tolist():
+      ranges += [name + " - Equipamento!A2:D", name + " - Profissional!A2:C", name + " - Insumo!A2:C"]
+    values = self.batch_get(ranges)
+    for k, id in enumerate(self.hospitals.ids.tolist()):
+      self.read_hospital_equipment(id, values[3*k])
+      self.read_hospital_staff(id, values[3*k + 1])
+      self.read_hospital_consumable(id, values[3*k + 2])
+
+  def authorize(self):
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    # The file token.json stores the user's access and refresh tokens, and is
+    # created automatically when the authorization flow completes for the first
+    # time.
+    if os.path.exists("token.json"):
+      self.creds = Credentials.from_authorized_user_file("token.json", self.scopes)
+    # If there are no (valid) credentials available, let the user log in.
+    if not self.creds or not self.creds.valid:
+      if self.creds and self.creds.expired and self.creds.refresh_token:
+        self.creds.refresh(Request())
+      else:
+        flow = InstalledAppFlow.from_client_secrets_file(
+            "credentials.json", self.scopes
+        )
+        self.creds = flow.run_local_server(port=0)
+        # Save the credentials for the next run
+      with open("token.json", "w") as token:
+        token.write(self.creds.to_json())
+
+  def get_revision(self):
+    # Drive version of the spreadsheet, bumped on every edit; None when it cannot be read
+    if self.creds is None:
+      return None
+    from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
+    try:
+      drive = build("drive", "v3", credentials=self.creds)
+      return drive.files().get(fileId=self.spreadsheet_id, fields="version").execute().get("version")
+    except HttpError as err:
+      print(err)
+      return None
+
+  def snapshot_path(self, revision):
+    return os.path.join(self.cache_dir, "{}-{}.pickle".format(self.spreadsheet_id,
+      revision if revision is not None else "latest"))
+
+  def snapshot_fresh(self, path):
+    if not os.path.exists(path):
+      return False
+    return self.ttl is None or time.time() - os.path.getmtime(path) < self.ttl
+
+  def latest_snapshot(self):
+    paths = glob.glob(os.path.join(glob.escape(self.cache_dir), self.spreadsheet_id + "-*.pickle"))
+    if not paths:
+      raise FileNotFoundError("No snapshot of spreadsheet {} in {}".format(self.spreadsheet_id,
+        self.cache_dir))
+    return max(paths, key=os.path.getmtime)
+
+  def load_snapshot(self, path):
+    with open(path, "rb") as snapshot:
+      content = pickle.load(snapshot)
+    self.revision = content["revision"]
+    if content.get("format") != SNAPSHOT_FORMAT:
+      self.load_records(content)
+      return
+    self.hospitals = Table.from_dict(content["hospitals"])
+    self.equipments = Table.from_dict(content["equipments"])
+    self.staff = Table.from_dict(content["staff"])
+    self.consumables = Table.from_dict(content["consumables"])
+    for name in ["equipment_quantity", "equipment_maintenance", "staff_quantity", "consumable_quantity"]:
+      setattr(self, name, content[name])
+
+  def load_records(self, content):
+    # Snapshots written before the columnar layout hold one dict per field, keyed by id, and nested
+    # inventory dicts
+    def table(records, **fields):
+      ids = records["ids"]
+      return Table(ids, **{name: np.array([records[name][id] for id in ids], dtype=dtype)
+        for name, dtype in fields.items()})
+    self.hospitals = table(content["hospitals"], names=str, construction_costs=np.float64, lb_beds=np.int64,
+      ub_beds=np.int64, coord_x=np.float64, coord_y=np.float64, built=bool)
+    self.equipments = table(content["equipments"], names=str, prices=np.float64, necessary_rates=np.float64,
+      maintenance_freqs=np.int64, maintenance_costs=np.float64)
+    self.staff = table(content["staff"], teams=str, salaries=np.float64, necessary_rates=np.float64)
+    self.consumables = table(content["consumables"], names=str, prices=np.float64, necessary_rates=np.float64)
+    self.equipment_quantity = np.zeros((len(self.hospitals), len(self.equipments)), dtype=np.int64)
+    self.equipment_maintenance = np.zeros_like(self.equipment_quantity)
+    self.staff_quantity = np.zeros((len(self.hospitals), len(self.staff)), dtype=np.int64)
+    self.consumable_quantity = np.zeros((len(self.hospitals), len(self.consumables)), dtype=np.int64)
+    for hospital_id, k in self.hospitals.index.items():
+      for id, (quantity, maintenance) in content["hospital_equipments"].get(hospital_id, {}).items():
+        if id in self.equipments.index:
+          self.equipment_quantity[k, self.equipments.index[id]] = quantity
+          self.equipment_maintenance[k, self.equipments.index[id]] = maintenance
+      for id, quantity in content["hospital_staff"].get(hospital_id, {}).items():
+        if id in self.staff.index:
+          self.staff_quantity[k, self.staff.index[id]] = quantity
+      for id, quantity in content["hospital_consumables"].get(hospital_id, {}).items():
+        if id in self.consumables.index:
+          self.consumable_quantity[k, self.consumables.index[id]] = quantity
+
+  def save_snapshot(self, path):
+    os.makedirs(self.cache_dir, exist_ok=True)
+    content = {
+      "format": SNAPSHOT_FORMAT,
+      "spreadsheet_id": self.spreadsheet_id,
+      "revision": self.revision,
+      "hospitals": self.hospitals.to_dict(),
+      "equipments": self.equipments.to_dict(),
+      "staff": self.staff.to_dict(),
+      "consumables": self.consumables.to_dict(),
+      "equipment_quantity": self.equipment_quantity,
+      "equipment_maintenance": self.equipment_maintenance,
+      "staff_quantity": self.staff_quantity,
+      "consumable_quantity": self.consumable_quantity
+    }
+    # Write then rename, so a concurrent reader never sees a partial snapshot
+    with open(path + ".tmp", "wb") as snapshot:
+      pickle.dump(content, snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+
+  def invalidate(self):
+    # Remove every snapshot of this spreadsheet
+    for path in glob.glob(os.path.join(glob.escape(self.cache_dir), self.spreadsheet_id + "-*.pickle")):
+      os.remove(path)
+
+  def batch_get(self, ranges):
+    # Values of each range, in order, fetched with as few values().batchGet calls as possible
+    from googleapiclient.errors import HttpError
+    values = []
+    for start in range(0, len(ranges), self.max_batch_ranges):
+      chunk = ranges[start:start + self.max_batch_ranges]
+      try:
+        # Call the Sheets API
+        result = (
+            self.service.spreadsheets().values()
+            .batchGet(spreadsheetId=self.spreadsheet_id, ranges=chunk)
+            .execute()
+        )
+        value_ranges = result.get("valueRanges", [])
+      except HttpError as err:
+        print(err)
+        value_ranges = []
+      for k, range_name in enumerate(chunk):
+        range_values = value_ranges[k].get("values", []) if k < len(value_ranges) else []
+        if not range_values:
+          print("No data found:", range_name)
+        values.append(range_values)
+    return values
+
+  def read_hospital(self, values):
+    self.hospitals = Table([int(row[0]) for row in values],
+      names=[row[1] for row in values],
+      construction_costs=np.array([_money(row[2]) for row in values], dtype=np.float64),
+      lb_beds=np.array([int(row[3]) for row in values], dtype=np.int64),
+      ub_beds=np.array([int(row[4]) for row in values], dtype=np.int64),
+      coord_x=np.array([_number(row[5]) for row in values], dtype=np.float64),
+      coord_y=np.array([_number(row[6]) for row in values], dtype=np.float64),
+      built=np.array([row[7] == "Construído" for row in values], dtype=bool))
+
+  def read_equipment(self, values):
+    self.equipments = Table([int(row[0]) for row in values],
+      names=[row[1] for row in values],
+      prices=np.array([_money(row[2]) for row in values], dtype=np.float64),
+      necessary_rates=np.array([float(row[3]) for row in values], dtype=np.float64),
+      maintenance_freqs=np.array([int(row[4]) for row in values], dtype=np.int64),
+      maintenance_costs=np.array([_money(row[5]) for row in values], dtype=np.float64))
+
+  def read_staff(self, values):
+    self.staff = Table([int(row[0]) for row in values],
+      teams=[row[1] for row in values],
+      salaries=np.array([_money(row[2]) for row in values], dtype=np.float64),
+      necessary_rates=np.array([math.ceil(7*24/int(row[3]))*_number(row[4]) for row in values], dtype=np.float64))
+
+  def read_consumable(self, values):
+    self.consumables = Table([int(row[0]) for row in values],
+      names=[row[1] for row in values],
+      prices=np.array([_money(row[2]) for row in values], dtype=np.float64),
+      necessary_rates=np.array([float(row[4]) for row in values], dtype=np.float64))
+
+  def read_hospital_equipment(self, hospital_id, values):
+    # Rows of entities missing from their own tab are skipped
+    rows = [row for row in values if int(row[0]) in self.equipments.index]
+    if rows:
+      i, j = self.hospitals.index[hospital_id], self.equipments.rows([int(row[0]) for row in rows])
+      self.equipment_quantity[i, j] = [int(row[2]) for row in rows]
+      self.equipment_maintenance[i, j] = [int(row[3]) for row in rows]
+
+  def read_hospital_staff(self, hospital_id, values):
+    rows = [row for row in values if int(row[0]) in self.staff.index]
+    if rows:
+      i, j = self.hospitals.index[hospital_id], self.staff.rows([int(row[0]) for row in rows])
+      self.staff_quantity[i, j] = [int(row[2]) for row in rows]
+
+  def read_hospital_consumable(self, hospital_id, values):
+    rows = [row for row in values if int(row[0]) in self.consumables.index]
+    if rows:
+      i, j = self.hospitals.index[hospital_id], self.consumables.rows([int(row[0]) for row in rows])
+      self.consumable_quantity[i, j] = [int(row[2]) for row in rows]
+
+  def get_hospital_ids(self):
+    return self.hospitals.ids
+
+  def get_hospital_name(self, id):
+    return self.hospitals.get("names", id)
+
+  def get_hospital_construction_cost(self, id):
+    return self.hospitals.get("construction_costs", id)
+
+  def get_hospital_lb_beds(self, id):
+    return self.hospitals.get("lb_beds", id)
+
+  def get_hospital_ub_beds(self, id):
+    return self.hospitals.get("ub_beds", id)
+
+  def get_hospital_coords(self, id):
+    return self.hospitals.get("coord_x", id), self.hospitals.get("coord_y", id)
+
+  def get_hospital_built(self, id):
+    return self.hospitals.get("built", id)
+
+  def get_equipment_ids(self):
+    return self.equipments.ids
+
+  def get_equipment_name(self, id):
+    return self.equipments.get("names", id)
+
+  def get_equipment_price(self, id):
+    return self.equipments.get("prices", id)
+
+  def get_equipment_necessary_rate(self, id):
+    return self.equipments.get("necessary_rates", id)
+
+  def get_equipment_maintenance_freq(self, id):
+    return self.equipments.get("maintenance_freqs", id)
+
+  def get_equipment_maintenance_cost(self, id):
+    return self.equipments.get("maintenance_costs", id)
+
+  def get_staff_ids(self):
+    return self.staff.ids
+
+  def get_staff_team(self, id):
+    return self.staff.get("teams", id)
+
+  def get_staff_salary(self, id):
+    return self.staff.get("salaries", id)
+
+  def get_staff_necessary_rate(self, id):
+    return self.staff.get("necessary_rates", id)
+
+  def get_consumable_ids(self):
+    return self.consumables.ids
+
+  def get_consumable_name(self, id):
+    return self.consumables.get("names", id)
+
+  def get_consumable_price(self, id):
+    return self.consumables.get("prices", id)
+
+  def get_consumable_necessary_rate(self, id):
+    return self.consumables.get("necessary_rates", id)
+
+  def get_equipment_quantity(self, hospital_id, equipment_id):
+    return int(self.equipment_quantity[self.hospitals.index[hospital_id], self.equipments.index[equipment_id]])
+
+  def get_equipment_maintenance(self, hospital_id, equipment_id):
+    return int(self.equipment_maintenance[self.hospitals.index[hospital_id], self.equipments.index[equipment_id]])
+
+  def get_staff_quantity(self, hospital_id, staff_id):
+    return int(self.staff_quantity[self.hospitals.index[hospital_id], self.staff.index[staff_id]])
+
+  def get_consumable_quantity(self, hospital_id, consumable_id):
+    return int(self.consumable_quantity[self.hospitals.index[hospital_id], self.consumables.index[consumable_id]])
+
+  # Vectorized accessors: whole inventory blocks, rows and columns in the order of the given ids (all
+  # of them, in sheet order, by default)
+
+  def get_equipment_quantities(self, hospital_ids=None, equipment_ids=None):
+    return _block(self.equipment_quantity, self.hospitals, hospital_ids, self.equipments, equipment_ids)
+
+  def get_equipment_maintenances(self, hospital_ids=None, equipment_ids=None):
+    return _block(self.equipment_maintenance, self.hospitals, hospital_ids, self.equipments, equipment_ids)
+
+  def get_staff_quantities(self, hospital_ids=None, staff_ids=None):
+    return _block(self.staff_quantity, self.hospitals, hospital_ids, self.staff, staff_ids)
+
+  def get_consumable_quantities(self, hospital_ids=None, consumable_ids=None):
+    return _block(self.consumable_quantity, self.hospitals, hospital_ids, self.consumables, consumable_ids)
+
+class Table:
+  # One entity tab as columns: the ids in sheet order, an id -> row map and one NumPy array per field
+  def __init__(self, ids, **columns):
+    self.ids = np.asarray(ids, dtype=np.int64)
+    self.index = {id: k for k, id in enumerate(self.ids.tolist())}
+    self.columns = {name: np.asarray(values) for name, values in columns.items()}
+
+  def __len__(self):
+    return len(self.ids)
+
+  def __getitem__(self, name):
+    return self.columns[name]
+
+  def rows(self, ids):
+    return np.array([self.index[id] for id in ids], dtype=np.int64)
+
+  def get(self, name, id):
+    # One field of one entity, as a Python scalar
+    return self.columns[name][self.index[id]].item()
+
+  def column(self, name, ids=None):
+    return self.columns[name] if ids is None else self.columns[name][self.rows(ids)]
+
+  def to_dict(self):
+    return dict(self.columns, ids=self.ids)
+
+  @classmethod
+  def from_dict(cls, content):
+    content = dict(content)
+    return cls(content.pop("ids"), **content)
+
+def _money(text):
+  return float(text.replace("R$ ", "").replace(".", "").replace(",", "."))
+
+def _number(text):
+  return float(text.replace(",", "."))
+
+def _block(matrix, rows, row_ids, columns, column_ids):
+  if row_ids is not None:
+    matrix = matrix[rows.rows(row_ids)]
+  if column_ids is not None:
+    matrix = matrix[:, columns.rows(column_ids)]
+  return matrix
@@ -0,0 +1,390 @@
+import os
+
+# Report renderers; both read only the Solution, so their cost follows the number of actions
+
+_ACQUIRE_TEXT = {'equipment': 'units of equipment', 'infrastructure': 'units of infrastructure',
+  'staff': 'professionals to staff', 'consumable': 'units of consumable'}
+_TRANSFER_TEXT = {'equipment': 'units of equipment', 'staff': 'professionals of staff'}
+
+def print_solution(solution):
+  for i in solution.built:
+    if i not in solution.K:
+      print('Build Hospital', i)
+    else:
+      print('Hospital', i)
+    print('\tTotal ICU beds:\t', int(solution.x[i]))
+    print('\tAdded ICU beds:\t', solution.added_beds(i))
+
+    if i in solution.acquire:
+      print('\tAcquire:')
+      for j, units in solution.acquire[i]:
+        print('\t\t\t', units, _ACQUIRE_TEXT[solution.kind(j)], j)
+    if i in solution.repair:
+      print('\tRepair:')
+      for j, units in solution.repair[i]:
+        print('\t\t\t', units, _ACQUIRE_TEXT[solution.kind(j)], j)
+    if i in solution.transfer:
+      print('\tTransfer:')
+      for j, l, units in solution.transfer[i]:
+        print('\t\t\t', units, _TRANSFER_TEXT[solution.kind(j)], j, 'to Hospital', l)
+    if i in solution.receive:
+      print('\tReceive:')
+      for j, l, units in solution.receive[i]:
+        print('\t\t\t', units, _TRANSFER_TEXT[solution.kind(j)], j, 'from Hospital', l)
+
+def html_sections(solution, collapsible=False, pages=None):
+  # The report piece by piece: the head with the summary, one chunk per hospital and the foot, so
+  # it can be streamed and never exists as one growing string. collapsible folds the actions of
+  # each hospital into a <details> element; pages maps each hospital to the file of its own page,
+  # and only a link to it is rendered here
+  yield _html_summary(solution)
+  if collapsible:
+    yield HTML_COLLAPSIBLE_STYLE
+  for i in solution.built:
+    yield ''.join(_html_hospital(solution, i, collapsible, pages[i] if pages else None))
+  yield HTML_FOOT
+
+def _html_summary(solution):
+  budget_str = str(f'{solution.objective:,}').replace('.', ',')
+  return HTML_HEAD + budget_str.replace(',', '.', budget_str.count(',') - 1) + \
+    HTML_SUMMARY.format(solution.num_hospitals(), solution.total_added_beds())
+
+def _html_hospital(solution, i, collapsible=False, page=None):
+  yield HTML_HOSPITAL.format(i)
+  if i not in solution.K:
+    yield HTML_CONSTRUCTION.format(solution.c[i])
+  yield HTML_BEDS.format(int(solution.x[i]), solution.added_beds(i))
+  if page is not None:
+    yield HTML_PAGE_LINK.format(page)
+    yield HTML_HOSPITAL_END
+    return
+
+  if collapsible:
+    yield HTML_DETAILS.format(len(solution.acquire.get(i, [])) + len(solution.repair.get(i, [])) +
+      len(solution.transfer.get(i, [])) + len(solution.receive.get(i, [])))
+  if i in solution.acquire:
+    yield HTML_ACQUIRE
+    for j, units in solution.acquire[i]:
+      yield HTML_ACQUIRE_ITEM[solution.kind(j)].format(units, j)
+    yield HTML_SECTION_END
+  if i in solution.repair:
+    yield HTML_REPAIR
+    for j, units in solution.repair[i]:
+      yield HTML_REPAIR_ITEM[solution.kind(j)].format(units, j)
+    yield HTML_SECTION_END
+  if i in solution.transfer:
+    yield HTML_TRANSFER
+    for j, l, units in solution.transfer[i]:
+      yield HTML_TRANSFER_ITEM[solution.kind(j)].format(units, j, l)
+    yield HTML_SECTION_END
+  if i in solution.receive:
+    yield HTML_RECEIVE
+    for j, l, units in solution.receive[i]:
+      yield HTML_RECEIVE_ITEM[solution.kind(j)].format(units, j, l)
+    yield HTML_SECTION_END
+  if collapsible:
+    yield HTML_DETAILS_END
+  yield HTML_HOSPITAL_END
+
+def to_html(solution, collapsible=False):
+  return ''.join(html_sections(solution, collapsible))
+
+def write_html(solution, file, collapsible=False):
+  # file: anything with write(str), e.g. an open file or socket.makefile('w')
+  for section in html_sections(solution, collapsible):
+    file.write(section)
+
+def write_html_pages(solution, filename):
+  # Index page at filename, linking to one page per hospital written next to it
+  directory, name = os.path.split(filename)
+  stem = os.path.splitext(name)[0]
+  pages = {i: '{}-hospital-{}.html'.format(stem, i) for i in solution.built}
+  with open(filename, 'w') as file:
+    for section in html_sections(solution, pages=pages):
+      file.write(section)
+  for i in solution.built:
+    with open(os.path.join(directory, pages[i]), 'w') as file:
+      file.write(_html_summary(solution))
+      for section in _html_hospital(solution, i):
+        file.write(section)
+      file.write(HTML_FOOT)
+  return [os.path.join(directory, page) for page in pages.values()]
+
+HTML_HEAD = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>Administra&ccedil;&atilde;o de leitos</title>
+<style>
+body {
+    font-family: 'Helvetica', sans-serif;
+    color: #707070;
+    background-color: #f2f2f2;
+    margin: 0;
+    padding: 0;
+}
+
+.header {
+    background-color: #16497F;
+    color: #fff;
+    width: 100%;
+    padding: 20px;
+    text-align: center;
+    box-shadow: 0 2px 4px rgba(0, 0, 0, 0.3);
+}
+
+.title {
+    font-size: 22px;
+    font-weight: bold;
+    text-align: center;
+}
+
+.subtitle {
+    margin: 30px 20px 0px 20px;
+    font-size: 20px;
+    font-weight: bold;
+    color: #505050;
+}
+
+.hospital-container {
+    display: flex;
+    flex-wrap: wrap;
+    justify-content: flex-start;
+    margin: 20px;
+}
+
+.hospital-box {
+    width: calc(28%);
+    margin: 10px;
+    padding: 10px;
+    border-radius: 10px;
+    box-shadow: 0 0 10px rgba(0,0,0,0.3);
+    background-color: #ffffff;
+}
+
+.clear-box {
+    padding: 5px;
+}
+
+.content {
+    font-size: 14px;
+    font-weight: normal;
+}
+
+.image-box {
+    width: calc(20%);
+    margin: 10px;
+    padding: 10px;
+    border-radius: 10px;
+    box-shadow: 0 0 10px rgba(0,0,0,0.3);
+    background-color: #16497F; /* Blue color */
+    color: #fff;
+    text-align: center;
+}
+
+.image-box img {
+    height: 70px;
+    display: block;
+    margin: 0 auto 10px; /* Center the image */
+}
+
+.image-box p {
+    margin: 0; /* Remove default margin */
+}
+
+.footer-box {
+    width: 100%;
+    padding: 10px;
+    text-align: center;
+}
+
+.footer-box img {
+    margin: 0px calc(3%);
+    height: 60px;
+}
+
+</style>
+</head>
+<body>
+<div class="header title">
+    Prescri&ccedil;&atilde;o de administra&ccedil;&atilde;o de leitos de UTI
+</div>
+<div class="subtitle">
+    <p>Informa&ccedil;&otilde;es gerais</p>
+</div>
+<div class="hospital-container">
+    <div class="image-box">
+        <img src="figures/coins.png" alt="Stack of coins">
+        <div class="content">Or&ccedil;amento previsto</div>
+        <div class="content"> R$ """
+
+HTML_SUMMARY = """ </div>
+    </div>
+    <div class="image-box">
+        <img src="figures/hospital.png" alt="Hospital">
+        <div class="content">Hospitais beneficiados</div> 
+        <div class="content"> {} </div>
+    </div>
+    <div class="image-box">
+        <img src="figures/hospital_bed.png" alt="Hospital beds">
+        <div class="content">Leitos adicionados</div>
+        <div class="content"> {} </div>
+    </div>
+</div>
+<div class="subtitle">
+    <p>A&ccedil;&otilde;es prescritas</p>
+</div>
+<div class="hospital-container">
+"""
+
+HTML_HOSPITAL = """
+<div class="hospital-box">
+    <div class="clear-box">
+        <strong> Hospital {} </strong> 
+"""
+
+HTML_CONSTRUCTION = """
+        <div class="clear-box content">
+            <strong> Construção: </strong> {}
+        </div>
+        """
+
+HTML_BEDS = """
+        <div class="clear-box content">
+            <strong> Leitos de UTI totais: </strong> {}
+        </div>
+        <div class="clear-box content">
+            <strong> Leitos de UTI adicionados: </strong> {}
+        </div>
+    """
+
+HTML_ACQUIRE = """
+        <div class="clear-box content">
+            <strong> Adquirir: </strong>
+        """
+
+HTML_ACQUIRE_ITEM = {
+  'equipment': """
+        <div class="clear-box content">
+            {} unidades do equipamento {}
+        </div>
+        """,
+  'infrastructure': """
+        <div class="clear-box content">
+            {} unidades da infraestrutura {}
+        </div>
+        """,
+  'staff': """
+        <div class="clear-box content">
+            {} profissionais para o time {}
+        </div>
+        """,
+  'consumable': """
+        <div class="clear-box content">
+            {} unidades do insumo {}
+        </div>
+        """
+}
+
+HTML_REPAIR = """
+    <div class="clear-box content">
+        <strong> Reparar: </strong>
+    """
+
+HTML_REPAIR_ITEM = {
+  'equipment': """
+    <div class="clear-box content">
+        {} unidades do equipamento {}
+    </div>
+    """,
+  'infrastructure': """
+    <div class="clear-box content">
+        {} unidades da infraestrutura {}
+    </div>
+    """
+}
+
+HTML_TRANSFER = """
+    <div class="clear-box content">
+        <strong> Transferir: </strong>
+    """
+
+HTML_TRANSFER_ITEM = {
+  'equipment': """
+    <div class="clear-box content">
+        {} unidades do equipamento {} ao Hospital {}
+    </div>
+    """,
+  'staff': """
+    <div class="clear-box content">
+        {} profissionais para o time {} do Hospital {}
+    </div>
+    """
+}
+
+HTML_RECEIVE = """
+    <div class="clear-box content">
+        <strong> Receber: </strong>
+    """
+
+HTML_RECEIVE_ITEM = {
+  'equipment': """
+    <div class="clear-box content">
+        {} unidades do equipamento {} do Hospital {}
+    </div>
+    """,
+  'staff': """
+    <div class="clear-box content">
+        {} profissionais do time {} do Hospital {}
+    </div>
+    """
+}
+
+HTML_DETAILS = """
+    <details class="clear-box content">
+        <summary> {} a&ccedil;&otilde;es </summary>
+"""
+
+HTML_DETAILS_END = """
+    </details>
+"""
+
+HTML_PAGE_LINK = """
+    <div class="clear-box content">
+        <a href="{}"> Ver a&ccedil;&otilde;es </a>
+    </div>
+"""
+
+HTML_COLLAPSIBLE_STYLE = """
+<style>
+details summary {
+    cursor: pointer;
+    font-weight: bold;
+}
+</style>
+"""
+
+HTML_SECTION_END = """
+    </div>
+"""
+
+HTML_HOSPITAL_END = """
+</div>
+</div>
+"""
+
+HTML_FOOT = """
+</div>
+</body>
+<hr color=#e9e9e9>
+<footer>
+<div class="footer-box">
+    <img src="figures/sus.png" alt="SUS">
+    <img src="figures/logo_20_years.png" alt="20 years">
+    <img src="figures/footer.png" alt="Footer">
+</div>
+</footer>
+</html>
+"""
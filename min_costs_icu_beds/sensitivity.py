@@ -0,0 +1,154 @@
+import json
+import math
+
+import numpy as np
+
+# What-ifs answered from one LP instead of a re-solve per question. With the openings y of a plan
+# fixed, the model's LP relaxation gives the marginal cost of the demand (the dual of the demand row),
+# the value of one more unit of each requirement at each hospital (the duals of the coverage rows) and,
+# from HiGHS's ranging, the interval of each right-hand side and price in which these stay valid. A
+# what-if inside its interval is answered by the plan's cost plus the marginal change; one outside it,
+# or about a hospital the plan does not build, needs a re-solve. The LP has continuous beds and units,
+# so the demand and availability answers are estimates; a price change inside its range re-prices the
+# plan's own purchases, which bounds the new optimum from above, as a cheaper plan may exist.
+
+def _finite(values):
+  # JSON has no infinities: an unbounded end of a range is null
+  return [None if not math.isfinite(value) else value for value in np.ravel(values).tolist()]
+
+def _infinite(values, sign, shape=None):
+  values = np.array([sign*math.inf if value is None else value for value in values], dtype=np.float64)
+  return values if shape is None else values.reshape(shape)
+
+class Sensitivity:
+  def __init__(self, objective, lp_objective, demand, demand_dual, demand_range, kinds, price, units,
+      price_range, built, available, value, available_range, reduced_cost):
+    # demand_range, price_range (R x 2) and available_range (F x R x 2): lowest and highest value for
+    # which the marginal figures hold; value (F x R): cost saved per extra unit available;
+    # reduced_cost (F x R): price drop at which buying at that hospital starts to pay in the LP
+    self.objective = objective
+    self.lp_objective = lp_objective
+    self.demand = demand
+    self.demand_dual = demand_dual
+    self.demand_range = demand_range
+    self.kinds = kinds
+    self.price = price
+    self.units = units
+    self.price_range = price_range
+    self.built = built
+    self.available = available
+    self.value = value
+    self.available_range = available_range
+    self.reduced_cost = reduced_cost
+
+  def what_if_demand(self, demand):
+    # Estimated cost at another demand, or None when a re-solve is needed
+    low, high = self.demand_range
+    if not low - 1e-9 <= demand <= high + 1e-9:
+      return None
+    return self.objective + self.demand_dual*(demand - self.demand)
+
+  def what_if_price(self, j, price):
+    # Cost of the same plan at another price, an upper bound on the optimum; None outside the range
+    low, high = self.price_range[j]
+    if not low - 1e-9 <= price <= high + 1e-9:
+      return None
+    return self.objective + self.units[j]*(price - self.price[j])
+
+  def what_if_available(self, i, j, units):
+    low, high = self.available_range[i, j]
+    if not self.built[i] or not low - 1e-9 <= units <= high + 1e-9:
+      return None
+    return self.objective - self.value[i, j]*(units - self.available[i, j])
+
+  def to_dict(self):
+    return {'objective': self.objective, 'lp_objective': self.lp_objective, 'demand': self.demand,
+      'demand_dual': self.demand_dual, 'demand_low': _finite(self.demand_range[0])[0],
+      'demand_high': _finite(self.demand_range[1])[0], 'kinds': self.kinds,
+      'price': self.price.tolist(), 'units': self.units.tolist(),
+      'price_low': _finite(self.price_range[:, 0]), 'price_high': _finite(self.price_range[:, 1]),
+      'built': self.built.tolist(), 'available': self.available.tolist(), 'value': self.value.tolist(),
+      'available_low': _finite(self.available_range[:, :, 0]),
+      'available_high': _finite(self.available_range[:, :, 1]), 'reduced_cost': self.reduced_cost.tolist()}
+
+  @classmethod
+  def from_dict(cls, content):
+    available = np.array(content['available'], dtype=np.float64)
+    return cls(content['objective'], content['lp_objective'], content['demand'], content['demand_dual'],
+      (_infinite([content['demand_low']], -1)[0], _infinite([content['demand_high']], 1)[0]),
+      content['kinds'], np.array(content['price']), np.array(content['units']),
+      np.column_stack([_infinite(content['price_low'], -1), _infinite(content['price_high'], 1)]),
+      np.array(content['built'], dtype=bool), available, np.array(content['value']),
+      np.stack([_infinite(content['available_low'], -1, available.shape),
+        _infinite(content['available_high'], 1, available.shape)], axis=2), np.array(content['reduced_cost']))
+
+  def save(self, filename):
+    with open(filename, 'w') as file:
+      json.dump(self.to_dict(), file)
+
+  def print_report(self):
+    print('Plan cost: {:,.2f} (LP with the openings fixed: {:,.2f})'.format(self.objective, self.lp_objective))
+    print('Demand: {} beds, {:,.2f} per extra bed for a demand from {} to {}'.format(self.demand,
+      self.demand_dual, _bound(self.demand_range[0]), _bound(self.demand_range[1])))
+    print('{:>12} {:>15} {:>14} {:>8} {:>14} {:>14}'.format('Requirement', 'Kind', 'Price', 'Units', 'Lowest',
+      'Highest'))
+    for j, kind in enumerate(self.kinds):
+      print('{:>12} {:>15} {:>14,.2f} {:>8} {:>14} {:>14}'.format(j, kind, self.price[j], int(self.units[j]),
+        _bound(self.price_range[j, 0]), _bound(self.price_range[j, 1])))
+    print('Value of one more unit available (built hospitals, nonzero values):')
+    print('{:>12} {:>12} {:>14} {:>10} {:>10} {:>10}'.format('Hospital', 'Requirement', 'Value', 'Available',
+      'Lowest', 'Highest'))
+    for i, j in zip(*np.nonzero(self.built[:, np.newaxis] & (np.abs(self.value) > 1e-9))):
+      print('{:>12} {:>12} {:>14,.2f} {:>10} {:>10} {:>10}'.format(i, j, self.value[i, j],
+        int(self.available[i, j]), _bound(self.available_range[i, j, 0]), _bound(self.available_range[i, j, 1])))
+
+def _bound(value):
+  return '-' if not math.isfinite(value) else '{:,.2f}'.format(value)
+
+def load(filename):
+  with open(filename) as file:
+    return Sensitivity.from_dict(json.load(file))
+
+def analyze(data, solution, arcs=None, presolve=True):
+  # The sensitivity of a solved plan (a Solution from any engine)
+  from .matrix_model import MatrixModel
+  model = MatrixModel(data, arcs, solve=False, presolve=presolve, warm_start=False)
+  n_f, n_r = model.n_f, model.n_r
+  lp = model.load(tee=False, relax=True)
+  y = solution.y.astype(np.float64)
+  columns = np.arange(model.y_start, model.z_start, dtype=np.int32)
+  lp.changeColsBounds(len(columns), columns, y, y)
+
+  # A price moves the cost of every z column of its requirement at once, so the purchases of each
+  # requirement are summed into one more column carrying the price, whose cost ranging is the price's
+  p = np.asarray(data.p, dtype=np.float64)
+  z_cols = model.z_start + np.arange(n_f*n_r).reshape(n_f, n_r)
+  lp.changeColsCost(n_f*n_r, z_cols.ravel().astype(np.int32), np.zeros(n_f*n_r))
+  total_cols = model.num_col + np.arange(n_r)
+  lp.addCols(n_r, p, np.zeros(n_r), np.full(n_r, np.inf), 0, np.zeros(n_r, dtype=np.int32),
+    np.zeros(0, dtype=np.int32), np.zeros(0))
+  indices = np.column_stack([z_cols.T, total_cols]).astype(np.int32) # row j: sum_i z[i, j] - total[j] = 0
+  lp.addRows(n_r, np.zeros(n_r), np.zeros(n_r), indices.size, (np.arange(n_r)*(n_f + 1)).astype(np.int32),
+    indices.ravel(), np.column_stack([np.ones((n_r, n_f)), -np.ones(n_r)]).ravel())
+  lp.run()
+  if lp.getModelStatus() != lp.getModelStatus().kOptimal:
+    raise ValueError('the LP with the openings fixed is not optimal: ' + lp.modelStatusToString(lp.getModelStatus()))
+  row_dual = np.array(lp.getSolution().row_dual)
+  col_dual = np.array(lp.getSolution().col_dual)
+  ranging = lp.getRanging()[1]
+  row_low, row_high = np.array(ranging.row_bound_dn.value_), np.array(ranging.row_bound_up.value_)
+  price_range = np.column_stack([np.array(ranging.col_cost_dn.value_)[total_cols],
+    np.array(ranging.col_cost_up.value_)[total_cols]])
+
+  # Coverage rows read a + z + ... - n*x >= 0 as z + ... - n*x >= -a
+  rows = model.coverage_rows
+  available = np.asarray(data.a, dtype=np.float64)
+  available_range = np.stack([-row_high[rows], -row_low[rows]], axis=2)
+  # The reduced cost of a purchase is that of its z column plus the price it no longer carries
+  reduced_cost = col_dual[z_cols] - row_dual[model.num_row + np.arange(n_r)]
+
+  i, j, units = solution.acquisitions
+  units = np.bincount(j, weights=units, minlength=n_r)
+  return Sensitivity(solution.objective, lp.getInfo().objective_function_value, int(data.d), float(row_dual[0]),
+    (float(row_low[0]), float(row_high[0])), [solution.kind(j) for j in range(n_r)], p, units, price_range,
+    solution.y > 0, available, row_dual[rows], available_range, reduced_cost)
@@ -0,0 +1,315 @@
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+import time
+import urllib.parse
+import uuid
+
+# Local HTTP/JSON solve service. Instances are posted to /jobs (text format, .npz bytes or the .npz
+# arrays as JSON, see Data.read_arrays), wait in a bounded queue and are solved on a pool of worker
+# processes with the matrix engine. Each job gets its own directory under the scratch directory for
+# its instance, report.html, solution.json and metrics.json, so concurrent jobs never share a path;
+# the report and the solution are rewritten with each better plan while the solver works.
+#
+#   POST   /jobs[?time_limit=S]   202 {"id", "status"}; 503 when the queue is full
+#   GET    /jobs                  every job and its status
+#   GET    /jobs/ID               status, objective, bound and gap of the best plan so far
+#   GET    /jobs/ID/events        progress as newline-delimited JSON, streamed until the job ends
+#   GET    /jobs/ID/report        the HTML report
+#   GET    /jobs/ID/solution      objective, beds per hospital and actions as JSON
+#   DELETE /jobs/ID               cancels a queued job, or forgets a finished one
+
+MAX_BODY = 256*2**20
+REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+  409: 'Conflict', 413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+def _finite(value):
+  # JSON has no infinities: an unknown bound or gap is null
+  return value if math.isfinite(value) else None
+
+def _solve_job(job_id, directory, instance, time_limit, events):
+  # Runs in a worker process; progress goes to events as (job id, event) pairs, and report.html and
+  # solution.json hold the best plan so far from the first incumbent on
+  from .data import Data
+  from .matrix_model import MatrixModel
+  from .snapshot import SnapshotWriter, gap
+  from .telemetry import Telemetry
+  events.put((job_id, {'event': 'started'}))
+  telemetry = Telemetry(command='serve', job=job_id)
+  with telemetry.phase('parse'):
+    data = Data(os.path.join(directory, instance))
+  started = time.perf_counter()
+  snapshots = [SnapshotWriter(os.path.join(directory, 'report.html')),
+    SnapshotWriter(os.path.join(directory, 'solution.json'))]
+  def improving(solution, bound):
+    for snapshot in snapshots:
+      snapshot(solution, bound)
+    events.put((job_id, {'event': 'incumbent', 'objective': solution.objective, 'bound': _finite(bound),
+      'gap': gap(solution.objective, bound), 'seconds': time.perf_counter() - started}))
+  model = MatrixModel(data, tee=False, solve=False, telemetry=telemetry, time_limit=time_limit,
+    on_incumbent=improving)
+  model.solve(False)
+  result = {'event': 'finished', 'status': model.highs.modelStatusToString(model.status),
+    'seconds': time.perf_counter() - started}
+  if model.solution is not None:
+    bound = model.highs.getInfo().mip_dual_bound
+    for snapshot in snapshots:
+      snapshot(model.solution, bound)
+      snapshot.flush(final=True)
+    result.update(objective=model.solution.objective, bound=_finite(bound), gap=gap(model.solution.objective, bound))
+  telemetry.write(os.path.join(directory, 'metrics.json'))
+  events.put((job_id, result))
+
+class Job:
+  def __init__(self, job_id, directory, instance, time_limit):
+    self.id = job_id
+    self.directory = directory
+    self.instance = instance
+    self.time_limit = time_limit
+    self.status = 'queued'
+    self.events = [{'event': 'queued'}]
+    self.changed = asyncio.Condition()
+
+  def summary(self):
+    summary = {'id': self.id, 'status': self.status, 'time_limit': self.time_limit}
+    for event in self.events:
+      for key in ['objective', 'bound', 'gap', 'error']:
+        if key in event:
+          summary[key] = event[key]
+      if event['event'] == 'finished':
+        summary['solver_status'] = event['status']
+    return summary
+
+  @property
+  def done(self):
+    return self.status in ('finished', 'failed', 'cancelled')
+
+class Service:
+  def __init__(self, workers=None, queue_size=16, time_limit=None, scratch_dir=None):
+    # time_limit: default and maximum seconds per job; scratch_dir: parent of the job directories
+    # (a temporary directory, removed on shutdown, when None)
+    self.workers = workers or os.cpu_count() or 1
+    self.queue_size = queue_size
+    self.time_limit = time_limit
+    self.temporary = scratch_dir is None
+    self.scratch_dir = tempfile.mkdtemp(prefix='min-costs-icu-beds-') if scratch_dir is None else scratch_dir
+    os.makedirs(self.scratch_dir, exist_ok=True)
+    self.jobs = {}
+
+  async def start(self, host='127.0.0.1', port=8080):
+    self.loop = asyncio.get_running_loop()
+    self.queue = asyncio.Queue(maxsize=self.queue_size)
+    self.manager = multiprocessing.Manager()
+    self.events = self.manager.Queue()
+    self.pool = multiprocessing.Pool(self.workers)
+    self.tasks = [asyncio.ensure_future(self.dispatch()) for _ in range(self.workers)]
+    self.tasks.append(asyncio.ensure_future(self.relay()))
+    self.server = await asyncio.start_server(self.handle, host, port)
+    return self.server
+
+  async def stop(self):
+    self.server.close()
+    self.pool.terminate() # running solves are abandoned
+    self.pool.join()
+    for task in self.tasks:
+      task.cancel()
+    await asyncio.gather(*self.tasks, return_exceptions=True)
+    for job in list(self.jobs.values()):
+      if not job.done:
+        await self.publish(job, {'event': 'failed', 'error': 'service stopped'}) # ends the event streams
+    await self.server.wait_closed()
+    self.events.put(None)
+    self.manager.shutdown()
+    if self.temporary:
+      shutil.rmtree(self.scratch_dir, ignore_errors=True)
+
+  async def dispatch(self):
+    # One per worker process: takes the next queued job and waits for its solve
+    while True:
+      job = await self.queue.get()
+      if job.status == 'cancelled':
+        continue
+      job.status = 'running'
+      done = self.loop.create_future()
+      self.pool.apply_async(_solve_job, (job.id, job.directory, job.instance, job.time_limit, self.events),
+        callback=lambda result: self.loop.call_soon_threadsafe(done.set_result, result),
+        error_callback=lambda error: self.loop.call_soon_threadsafe(done.set_exception, error))
+      try:
+        await done
+      except Exception as error:
+        await self.publish(job, {'event': 'failed', 'error': '{}: {}'.format(type(error).__name__, error)})
+
+  async def relay(self):
+    # Moves the events of the worker processes to their jobs
+    while True:
+      item = await self.loop.run_in_executor(None, self.events.get)
+      if item is None:
+        return
+      job = self.jobs.get(item[0])
+      if job is not None:
+        await self.publish(job, item[1])
+
+  async def publish(self, job, event):
+    if event['event'] in ('finished', 'failed'):
+      job.status = event['event']
+    async with job.changed:
+      job.events.append(event)
+      job.changed.notify_all()
+
+  def submit(self, body, content_type, time_limit=None):
+    if self.time_limit is not None:
+      time_limit = self.time_limit if time_limit is None else min(time_limit, self.time_limit)
+    if self.queue.full():
+      return None
+    job_id = uuid.uuid4().hex[:12]
+    directory = os.path.join(self.scratch_dir, job_id)
+    os.makedirs(directory)
+    if content_type == 'application/json':
+      instance = 'instance.json'
+    elif content_type in ('application/octet-stream', 'application/x-npz'):
+      instance = 'instance.npz'
+    else:
+      instance = 'instance.txt'
+    with open(os.path.join(directory, instance), 'wb') as file:
+      file.write(body)
+    job = Job(job_id, directory, instance, time_limit)
+    self.jobs[job_id] = job
+    self.queue.put_nowait(job)
+    return job
+
+  async def handle(self, reader, writer):
+    try:
+      request = await self.read_request(reader)
+      if request is not None:
+        await self.route(writer, *request)
+    except ValueError:
+      self.respond(writer, 400, {'error': 'malformed request'})
+    except (ConnectionError, asyncio.IncompleteReadError):
+      pass
+    finally:
+      writer.close()
+
+  async def read_request(self, reader):
+    line = await reader.readline()
+    if not line:
+      return None
+    method, target, _ = line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+      line = await reader.readline()
+      if line in (b'\r\n', b'\n', b''):
+        break
+      name, _, value = line.decode('latin-1').partition(':')
+      headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY:
+      return method, target, headers, None
+    body = await reader.readexactly(length) if length else b''
+    return method, target, headers, body
+
+  def respond(self, writer, status, body, content_type='application/json'):
+    if content_type == 'application/json':
+      body = json.dumps(body) + '\n'
+    if isinstance(body, str):
+      body = body.encode()
+    writer.write('HTTP/1.1 {} {}\r\nContent-Type: {}\r\nContent-Length: {}\r\nConnection: close\r\n\r\n'.format(
+      status, REASONS[status], content_type, len(body)).encode() + body)
+
+  async def route(self, writer, method, target, headers, body):
+    url = urllib.parse.urlsplit(target)
+    query = urllib.parse.parse_qs(url.query)
+    parts = [part for part in url.path.split('/') if part]
+    if parts[:1] != ['jobs'] or len(parts) > 3:
+      return self.respond(writer, 404, {'error': 'not found'})
+    if len(parts) == 1:
+      if method == 'GET':
+        return self.respond(writer, 200, [job.summary() for job in self.jobs.values()])
+      if method != 'POST':
+        return self.respond(writer, 405, {'error': 'use GET or POST'})
+      if body is None:
+        return self.respond(writer, 413, {'error': 'instance larger than {} bytes'.format(MAX_BODY)})
+      try:
+        time_limit = float(query['time_limit'][0]) if 'time_limit' in query else None
+      except ValueError:
+        return self.respond(writer, 400, {'error': 'time_limit must be a number of seconds'})
+      content_type = headers.get('content-type', 'text/plain').split(';')[0].strip()
+      job = self.submit(body, content_type, time_limit)
+      if job is None:
+        return self.respond(writer, 503, {'error': 'queue full ({} jobs)'.format(self.queue_size)})
+      return self.respond(writer, 202, job.summary())
+
+    job = self.jobs.get(parts[1])
+    if job is None:
+      return self.respond(writer, 404, {'error': 'no job {}'.format(parts[1])})
+    if len(parts) == 2:
+      if method == 'GET':
+        return self.respond(writer, 200, job.summary())
+      if method != 'DELETE':
+        return self.respond(writer, 405, {'error': 'use GET or DELETE'})
+      if job.status == 'running':
+        return self.respond(writer, 409, {'error': 'job {} is running'.format(job.id)})
+      if job.status == 'queued':
+        job.status = 'cancelled'
+        await self.publish(job, {'event': 'cancelled'})
+      del self.jobs[job.id]
+      shutil.rmtree(job.directory, ignore_errors=True)
+      return self.respond(writer, 200, job.summary())
+    if method != 'GET':
+      return self.respond(writer, 405, {'error': 'use GET'})
+    if parts[2] == 'events':
+      return await self.stream(writer, job)
+    files = {'report': ('report.html', 'text/html; charset=utf-8'), 'solution': ('solution.json', 'application/json'),
+      'metrics': ('metrics.json', 'application/json')}
+    if parts[2] not in files:
+      return self.respond(writer, 404, {'error': 'not found'})
+    name, content_type = files[parts[2]]
+    path = os.path.join(job.directory, name)
+    if not os.path.exists(path):
+      return self.respond(writer, 409 if not job.done else 404,
+        {'error': 'job {} is {}'.format(job.id, job.status) if not job.done else 'no {} for job {}'.format(parts[2], job.id)})
+    with open(path, 'rb') as file:
+      content = file.read()
+    writer.write('HTTP/1.1 200 OK\r\nContent-Type: {}\r\nContent-Length: {}\r\nConnection: close\r\n\r\n'.format(
+      content_type, len(content)).encode() + content)
+
+  async def stream(self, writer, job):
+    # Every event so far, then each new one as it arrives, in chunked encoding
+    writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n'
+      b'Connection: close\r\n\r\n')
+    sent = 0
+    while True:
+      async with job.changed:
+        await job.changed.wait_for(lambda: len(job.events) > sent or job.done)
+        events = job.events[sent:]
+      for event in events:
+        line = (json.dumps(event) + '\n').encode()
+        writer.write('{:x}\r\n'.format(len(line)).encode() + line + b'\r\n')
+      sent += len(events)
+      await writer.drain()
+      if job.done and sent == len(job.events):
+        break
+    writer.write(b'0\r\n\r\n')
+    await writer.drain()
+
+def serve(host='127.0.0.1', port=8080, **options):
+  async def run():
+    service = Service(**options)
+    server = await service.start(host, port)
+    print('Serving on http://{}:{} ({} workers, queue of {}, scratch space in {})'.format(host, port,
+      service.workers, service.queue_size, service.scratch_dir), flush=True)
+    # Ctrl-C or SIGTERM stops the server, abandons the running solves and removes the scratch space
+    serving = asyncio.ensure_future(server.serve_forever())
+    for signum in (signal.SIGINT, signal.SIGTERM):
+      asyncio.get_running_loop().add_signal_handler(signum, serving.cancel)
+    try:
+      await serving
+    except asyncio.CancelledError:
+      pass
+    finally:
+      await service.stop()
+  asyncio.run(run())
@@ -0,0 +1,44 @@
+import numpy as np
+
+from .data import Data
+
+# Optimization data straight from the spreadsheet reader (see read_data.py), without a text
+# instance in between. Hospitals keep the sheet order; the requirements are the equipments (E), the
+# staff teams (S) and the consumables (C), as the sheet has no infrastructure tab. The per-entity
+# columns are used as they are where the model takes them unchanged (bounds on beds, repair costs),
+# so only the combined arrays are new
+
+def to_data(read_data, demand, transfer_rates=1.0):
+  # demand: ICU beds to allocate, which the sheet does not hold; transfer_rates: cost of moving one
+  # unit one coordinate unit, for all transferable requirements or one per equipment and staff team
+  # (in that order). Working equipment is the quantity minus the units needing maintenance, which
+  # become the repairable units (m, at most the quantity) at the maintenance cost (r)
+  hospitals, equipments = read_data.hospitals, read_data.equipments
+  staff, consumables = read_data.staff, read_data.consumables
+  n_f, n_e, n_s, n_c = len(hospitals), len(equipments), len(staff), len(consumables)
+
+  data = Data()
+  data.F = list(range(n_f))
+  data.K = np.nonzero(hospitals['built'])[0].tolist()
+  data.E = list(range(n_e))
+  data.I = []
+  data.S = list(range(n_e, n_e + n_s))
+  data.C = list(range(n_e + n_s, n_e + n_s + n_c))
+  data.d = int(demand)
+  data.c = np.where(hospitals['built'], 0.0, hospitals['construction_costs'])
+  data.l = hospitals['lb_beds']
+  data.u = hospitals['ub_beds']
+  data.p = np.concatenate([equipments['prices'], staff['salaries'], consumables['prices']])
+  data.r = equipments['maintenance_costs']
+  data.n = np.concatenate([equipments['necessary_rates'], staff['necessary_rates'], consumables['necessary_rates']])
+  data.m = np.minimum(read_data.equipment_maintenance, read_data.equipment_quantity)
+  data.a = np.concatenate([read_data.equipment_quantity - data.m, read_data.staff_quantity,
+    read_data.consumable_quantity], axis=1)
+
+  data.coords = np.column_stack([hospitals['coord_x'], hospitals['coord_y']])
+  distance = np.sqrt(((data.coords[:, None, :] - data.coords[None, :, :])**2).sum(axis=2))
+  transferable = data.E + data.S
+  data.t = np.zeros((n_e + n_s + n_c, n_f, n_f))
+  data.t[transferable] = np.broadcast_to(np.asarray(transfer_rates, dtype=np.float64),
+    (len(transferable),))[:, None, None]*distance
+  return data
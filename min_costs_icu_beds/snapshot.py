@@ -0,0 +1,68 @@
+import json
+import math
+import os
+import time
+import uuid
+
+from . import report
+
+# The best plan so far on disk while the solver keeps working. Engines built with on_incumbent call
+# it with each improved Solution and the solver's dual bound; a SnapshotWriter passed there rewrites
+# an HTML report (for a .html filename) or a JSON snapshot with the plan, its bound and proven gap
+# (any other name). Files are written then renamed, so a reader never sees a partial one.
+
+def solution_dict(solution):
+  return {
+    'objective': solution.objective,
+    'hospitals': [{'hospital': i, 'built': i in solution.K, 'beds': int(solution.x[i]),
+      'added_beds': solution.added_beds(i),
+      'acquire': [{'requirement': j, 'kind': solution.kind(j), 'units': units}
+        for j, units in solution.acquire.get(i, [])],
+      'repair': [{'requirement': j, 'kind': solution.kind(j), 'units': units}
+        for j, units in solution.repair.get(i, [])],
+      'transfer': [{'requirement': j, 'kind': solution.kind(j), 'to': l, 'units': units}
+        for j, l, units in solution.transfer.get(i, [])]} for i in solution.built],
+  }
+
+def gap(objective, bound):
+  # Relative gap as HiGHS reports it, or None while there is no finite bound
+  if bound is None or not math.isfinite(bound):
+    return None
+  return abs(objective - bound)/max(abs(objective), 1.0)
+
+class SnapshotWriter:
+  def __init__(self, filename, interval=1.0):
+    # interval: least seconds between two writes; a skipped incumbent is written by the next one or
+    # by flush()
+    self.filename = filename
+    self.interval = interval
+    self.started = time.perf_counter()
+    self.written = -math.inf
+    self.latest = None
+    self.pending = False
+    self.count = 0
+
+  def __call__(self, solution, bound=None):
+    self.latest = (solution, bound, time.perf_counter() - self.started)
+    self.pending = True
+    if time.perf_counter() - self.written >= self.interval:
+      self.flush()
+
+  def flush(self, final=False):
+    # Writes the latest incumbent unless it is on disk already; final marks, and always rewrites, the
+    # snapshot of the finished solve
+    if self.latest is None or not (self.pending or final):
+      return
+    solution, bound, seconds = self.latest
+    directory = os.path.dirname(os.path.abspath(self.filename))
+    path = os.path.join(directory, '.{}.tmp'.format(uuid.uuid4().hex))
+    with open(path, 'w') as file:
+      if self.filename.endswith('.html'):
+        report.write_html(solution, file)
+      else:
+        json.dump(dict(solution_dict(solution), bound=bound if bound is not None and math.isfinite(bound) else None,
+          gap=gap(solution.objective, bound), seconds=seconds, final=final), file)
+    os.replace(path, self.filename)
+    self.written = time.perf_counter()
+    self.pending = False
+    self.count += 1
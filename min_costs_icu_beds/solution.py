@@ -0,0 +1,62 @@
+import numpy as np
+
+class Solution:
+  def __init__(self, data, objective, x, y, z, w, v, arc_j, arc_i, arc_l):
+    # Solver values pulled out once after a solve; only the nonzero acquisitions, repairs and
+    # transfers are kept, indexed per hospital, so reports cost O(actions) rather than O(|R||F|^2)
+    self.objective = float(objective)
+    self.F = list(data.F)
+    self.K = list(data.K)
+    self.E = list(data.E)
+    self.I = list(data.I)
+    self.S = list(data.S)
+    self.C = list(data.C)
+    self.c = np.asarray(data.c, dtype=np.float64)
+    self.x = np.rint(x).astype(np.int64)
+    self.y = np.rint(y).astype(np.int64)
+    with np.errstate(divide='ignore'):
+      self.cur_beds = (np.asarray(data.a, dtype=np.float64)/np.asarray(data.n, dtype=np.float64)).min(axis=1)
+
+    z, w, v = np.rint(z).astype(np.int64), np.rint(w).astype(np.int64), np.rint(v).astype(np.int64)
+    i, j = np.nonzero(z > 0)
+    self.acquisitions = (i, j, z[i, j]) # (facility, requirement, units)
+    i, j = np.nonzero(w > 0)
+    self.repairs = (i, j, w[i, j]) # (facility, requirement, units)
+    k = np.nonzero(v > 0)[0]
+    self.transfers = (np.asarray(arc_j)[k], np.asarray(arc_i)[k], np.asarray(arc_l)[k], v[k]) # (requirement, from, to, units)
+
+    # Per-hospital lists, in requirement order and then destination (or origin) order
+    self.built = [i for i in self.F if self.y[i] > 0]
+    self.acquire = {}
+    self.repair = {}
+    self.transfer = {}
+    self.receive = {}
+    for i, j, units in zip(*(column.tolist() for column in self.acquisitions)):
+      self.acquire.setdefault(i, []).append((j, units))
+    for i, j, units in zip(*(column.tolist() for column in self.repairs)):
+      self.repair.setdefault(i, []).append((j, units))
+    for j, i, l, units in sorted(zip(*(column.tolist() for column in self.transfers))):
+      self.transfer.setdefault(i, []).append((j, l, units))
+      self.receive.setdefault(l, []).append((j, i, units))
+
+  def added_beds(self, i):
+    return int(self.x[i] - self.cur_beds[i])
+
+  def num_hospitals(self):
+    return len(self.built)
+
+  def hospitals_opened(self):
+    return len([i for i in self.built if i not in self.K])
+
+  def total_added_beds(self):
+    return sum([self.added_beds(i) for i in self.built])
+
+  def kind(self, j):
+    # E, I, S and C are consecutive ranges of requirement ids
+    if j < len(self.E):
+      return 'equipment'
+    if j < len(self.E + self.I):
+      return 'infrastructure'
+    if j < len(self.E + self.I + self.S):
+      return 'staff'
+    return 'consumable'
@@ -0,0 +1,86 @@
+import concurrent.futures
+import copy
+import csv
+import os
+
+import numpy as np
+
+# Minimum cost for each ICU-bed demand level of a grid. The sorted grid is split into contiguous
+# blocks, one per worker process; inside a block every solve is an incremental update of the
+# previous model, warm-started from its plan, and a level is not solved at all when the previous
+# optimal plan already has enough beds (the optimal cost is nondecreasing in d). A level without a plan
+# is reported with its status, and the next level is solved from a new model
+
+COLUMNS = ['demand', 'status', 'cost', 'hospitals_opened', 'beds', 'beds_added', 'reused']
+
+def _summary(model, demand, reused):
+  import highspy
+  if model.status != highspy.HighsModelStatus.kOptimal:
+    return {'demand': demand, 'status': model.highs.modelStatusToString(model.status), 'cost': None,
+      'hospitals_opened': None, 'beds': None, 'beds_added': None, 'reused': reused}
+  solution = model.solution
+  return {'demand': demand, 'status': 'Optimal', 'cost': solution.objective,
+    'hospitals_opened': solution.hospitals_opened(), 'beds': int(solution.x.sum()),
+    'beds_added': solution.total_added_beds(), 'reused': reused}
+
+def _sweep_block(data, demands, tee):
+  from .matrix_model import MatrixModel
+  rows = []
+  model = None
+  for demand in demands:
+    if model is None or rows[-1]['cost'] is None:
+      data.d = demand
+      model = MatrixModel(data, tee=tee)
+      rows.append(_summary(model, demand, False))
+    elif rows[-1]['beds'] is not None and rows[-1]['beds'] >= demand:
+      rows.append(dict(rows[-1], demand=demand, reused=True))
+    else:
+      model.update(d=demand, tee=tee)
+      rows.append(_summary(model, demand, False))
+  return rows
+
+def sweep(data, demands, workers=None, tee=False):
+  demands = sorted(set(int(d) for d in demands))
+  workers = min(workers or os.cpu_count() or 1, len(demands))
+  blocks = [block.tolist() for block in np.array_split(demands, workers) if len(block)]
+  if workers == 1:
+    return _sweep_block(copy.deepcopy(data), blocks[0], tee)
+  with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+    results = executor.map(_sweep_block, [data]*len(blocks), blocks, [tee]*len(blocks))
+    return [row for rows in results for row in rows]
+
+def print_table(rows):
+  print('{:>8} {:>14} {:>10} {:>6} {:>8}  {}'.format('Demand', 'Cost', 'Opened', 'Beds', 'Added',
+    'Status'))
+  for row in rows:
+    if row['cost'] is None:
+      print('{:>8} {:>14} {:>10} {:>6} {:>8}  {}'.format(row['demand'], '-', '-', '-', '-', row['status']))
+    else:
+      print('{:>8} {:>14,.2f} {:>10} {:>6} {:>8}  {}'.format(row['demand'], row['cost'],
+        row['hospitals_opened'], row['beds'], row['beds_added'],
+        row['status'] + (' (reused)' if row['reused'] else '')))
+
+def write_csv(rows, filename):
+  with open(filename, 'w', newline='') as file:
+    writer = csv.DictWriter(file, fieldnames=COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+
+def plot(rows, filename):
+  # matplotlib is optional and only needed for the plot
+  import matplotlib
+  matplotlib.use('Agg')
+  import matplotlib.pyplot as plt
+  solved = [row for row in rows if row['cost'] is not None]
+  figure, cost_axis = plt.subplots(figsize=(8, 4.5))
+  cost_axis.step([row['demand'] for row in solved], [row['cost'] for row in solved], where='post',
+    color='#16497F')
+  cost_axis.set_xlabel('Demanda de leitos de UTI')
+  cost_axis.set_ylabel('Custo (R$)')
+  beds_axis = cost_axis.twinx()
+  beds_axis.plot([row['demand'] for row in solved], [row['beds_added'] for row in solved], color='#707070',
+    linestyle='--')
+  beds_axis.set_ylabel('Leitos adicionados')
+  figure.tight_layout()
+  figure.savefig(filename)
+  plt.close(figure)
@@ -0,0 +1,122 @@
+import contextlib
+import json
+import math
+import re
+import sys
+import time
+
+try:
+  import resource
+except ImportError: # not available on Windows
+  resource = None
+
+# Wall and CPU time of each pipeline phase plus model and solver statistics, written as JSON or in the
+# Prometheus text format so nightly runs can be scraped and compared. A phase that runs more than once
+# (re-solves after update(), price-out rounds) accumulates its times
+
+PRESOLVE_REDUCTIONS = re.compile(r'Presolve reductions: rows (\d+)\(-(\d+)\); columns (\d+)\(-(\d+)\); '
+  r'nonzeros (\d+)\(-(\d+)\)')
+
+def _peak_rss_mb():
+  if resource is None:
+    return None
+  # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+  peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  return round(peak/(2**20 if sys.platform == 'darwin' else 2**10), 1)
+
+class Telemetry:
+  def __init__(self, **labels):
+    # labels (instance, engine, ...) are attached to every Prometheus sample
+    self.labels = {key: str(value) for key, value in labels.items()}
+    self.phases = {}
+    self.metrics = {}
+    self._watched = set()
+
+  @contextlib.contextmanager
+  def phase(self, name):
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+      yield
+    finally:
+      record = self.phases.setdefault(name, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+      record['calls'] += 1
+      record['wall_seconds'] += time.perf_counter() - wall
+      record['cpu_seconds'] += time.process_time() - cpu
+      record['peak_rss_mb'] = _peak_rss_mb()
+
+  def set(self, name, value):
+    self.metrics[name] = value
+
+  def watch(self, highs, tee=False):
+    # Call right before highs.run(): the callbacks note the time of the first incumbent and parse the
+    # presolve reductions from the log, which HiGHS only produces with output_flag on
+    self._run_start = time.perf_counter()
+    self.metrics.pop('first_incumbent_seconds', None)
+    highs.setOptionValue('output_flag', True)
+    highs.setOptionValue('log_to_console', tee)
+    if id(highs) in self._watched:
+      return
+    self._watched.add(id(highs))
+    highs.cbMipImprovingSolution.subscribe(self._incumbent)
+    highs.cbLogging.subscribe(self._log)
+
+  def _incumbent(self, event):
+    self.metrics.setdefault('first_incumbent_seconds', time.perf_counter() - self._run_start)
+
+  def _log(self, event):
+    match = PRESOLVE_REDUCTIONS.search(event.message)
+    if match:
+      rows, cols, nonzeros = (int(match.group(k)) for k in (2, 4, 6))
+      self.metrics.update(presolve_rows_removed=rows, presolve_columns_removed=cols,
+        presolve_nonzeros_removed=nonzeros)
+
+  def record_solver(self, highs):
+    # Call after highs.run()
+    info = highs.getInfo()
+    self.metrics.update(variables=highs.getNumCol(), constraints=highs.getNumRow(),
+      nonzeros=highs.getNumNz(), status=highs.modelStatusToString(highs.getModelStatus()),
+      objective=info.objective_function_value, dual_bound=info.mip_dual_bound, gap=info.mip_gap,
+      nodes=info.mip_node_count, simplex_iterations=info.simplex_iteration_count,
+      solver_seconds=highs.getRunTime())
+
+  def to_dict(self):
+    return {'labels': self.labels, 'phases': self.phases, 'metrics': self.metrics}
+
+  def to_json(self):
+    return json.dumps(_finite(self.to_dict()), indent=2, allow_nan=False)
+
+  def to_prometheus(self, prefix='min_costs_icu_beds'):
+    lines = []
+    def sample(name, value, **labels):
+      labels = dict(self.labels, **labels)
+      text = ','.join('{}="{}"'.format(key, str(label).replace('\\', '\\\\').replace('"', '\\"'))
+        for key, label in sorted(labels.items()))
+      lines.append('{}_{}{} {}'.format(prefix, name, '{' + text + '}' if text else '', value))
+    for field in ['calls', 'wall_seconds', 'cpu_seconds', 'peak_rss_mb']:
+      lines.append('# TYPE {}_phase_{} gauge'.format(prefix, field))
+      for name, record in self.phases.items():
+        if record.get(field) is not None:
+          sample('phase_' + field, record[field], phase=name)
+    for name, value in sorted(self.metrics.items()):
+      lines.append('# TYPE {}_{} gauge'.format(prefix, name))
+      if isinstance(value, str):
+        sample(name, 1, **{name: value})
+      else:
+        sample(name, value)
+    return '\n'.join(lines) + '\n'
+
+  def write(self, filename):
+    # .prom files get the Prometheus text format (for the node exporter's textfile collector), others JSON
+    text = self.to_prometheus() if str(filename).endswith('.prom') else self.to_json() + '\n'
+    with open(filename, 'w') as file:
+      file.write(text)
+
+def _finite(value):
+  # JSON has no infinities or NaN (an unbounded gap, a bound before any plan): they become null
+  if isinstance(value, dict):
+    return {key: _finite(item) for key, item in value.items()}
+  if isinstance(value, (list, tuple)):
+    return [_finite(item) for item in value]
+  if isinstance(value, float) and not math.isfinite(value):
+    return None
+  return value